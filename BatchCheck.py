@@ -0,0 +1,215 @@
+"""
+Headless batch checker: compares submissions without the GUI and streams one result
+per line as pairs finish.
+
+    python BatchCheck.py submissions/ --jobs 32 --threshold 0.6 --format csv -o report.csv
+    python BatchCheck.py --base 'week1/*.py' --compare archive.zip --format json
+    python BatchCheck.py --corpus course.sqlite late_submission.py
+    python BatchCheck.py --corpus course.sqlite --watch submissions/
+    python BatchCheck.py submissions/ --stats stats.json --profile run.prof
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+
+import Constants
+from engine import Profiling
+from engine.Corpus import CorpusSession
+from engine.Fingerprint import FingerprintIndex
+from engine.MinHash import MinHashLSH
+from engine.ParallelCompare import iter_compare_pairs
+from engine.Submissions import READ_ERRORS, DuplicateGroups, collect_submissions, read_submission, submission_hash
+from engine.Watch import DirectoryWatcher
+
+FIELDS = ('base_file', 'compare_file', 'similarity', 'estimate')
+
+def report_skipped(file, error):
+    print(f'Skipping {file}: {error}', file=sys.stderr)
+
+def report_skipped_pair(base_file, compare_file, error):
+    print(f'Skipping {base_file} x {compare_file}: {error}', file=sys.stderr)
+
+def candidate_pairs(base_files, compare_files, screen=Constants.CANDIDATE_SCREEN, all_pairs=False):
+    """
+    Return the (base, compare) pairs worth comparing, the MinHash signatures used to
+    estimate their similarity, the groups of identical submissions and the number of
+    pairs the screen left out. Only the first
+    copy of each distinct content is indexed and paired. With all_pairs, every unordered
+    pair of distinct files is listed once instead of every base x compare combination.
+    Files that cannot be read are reported on stderr and left out.
+    """
+    fingerprints = FingerprintIndex()
+    signatures = MinHashLSH()
+    duplicates = DuplicateGroups()
+    for file in dict.fromkeys(base_files + compare_files):
+        try:
+            content = read_submission(file)
+            digest = submission_hash(file)
+        except READ_ERRORS as error:
+            report_skipped(file, error)
+            continue
+        if not duplicates.add(file, digest):
+            continue
+        if screen == 'winnowing':
+            fingerprints.add(file, content)
+        signatures.add(file, content)
+
+    base_files = duplicates.unique(base_files)
+    compare_files = duplicates.unique(compare_files)
+    pairs = []
+    screened_out = 0
+    for position, base_file in enumerate(base_files):
+        others = compare_files[position + 1:] if all_pairs else compare_files
+        others = [other for other in others if other != base_file]
+        candidates = others
+        if screen == 'winnowing':
+            candidates = fingerprints.candidates(base_file, others)
+        elif screen == 'minhash':
+            candidates = signatures.candidates(base_file, others)
+        screened_out += len(others) - len(candidates)
+        pairs.extend((base_file, compare_file) for compare_file in candidates)
+    return pairs, signatures, duplicates, screened_out
+
+class ResultWriter:
+    def __init__(self, output, output_format):
+        self.output = output
+        self.output_format = output_format
+        if output_format == 'csv':
+            self.csv_writer = csv.writer(output)
+            self.csv_writer.writerow(FIELDS)
+
+    def write(self, base_file, compare_file, similarity, estimate):
+        if self.output_format == 'csv':
+            self.csv_writer.writerow((base_file, compare_file, f'{similarity:.6f}', f'{estimate:.6f}'))
+        else:
+            self.output.write(json.dumps(dict(zip(FIELDS, (base_file, compare_file, similarity, estimate)))) + '\n')
+        self.output.flush()
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Compare code submissions without the GUI.')
+    parser.add_argument('paths', nargs='*', help='directories, globs or zip files compared all against all')
+    parser.add_argument('--base', nargs='+', default=[], help='submissions to check')
+    parser.add_argument('--compare', nargs='+', default=[], help='submissions to check them against')
+    parser.add_argument('--threshold', type=float, default=0.0, help='only report pairs at least this similar')
+    parser.add_argument('--jobs', type=int, default=Constants.COMPARE_WORKERS,
+                        help='worker processes (default: every CPU core)')
+    parser.add_argument('--format', choices=('json', 'csv'), default='json',
+                        help='JSON lines or CSV (default: json)')
+    parser.add_argument('--screen', choices=('winnowing', 'minhash', 'none'), default=Constants.CANDIDATE_SCREEN,
+                        help='how candidate pairs are selected before the full comparison')
+    parser.add_argument('--corpus', help='add paths to this corpus session and only compare new or changed files')
+    parser.add_argument('--watch', action='store_true',
+                        help='keep polling the directories in paths and report the pairs of changed files '
+                             f'(kept in --corpus, default: {Constants.CORPUS_PATH})')
+    parser.add_argument('--interval', type=float, default=Constants.WATCH_INTERVAL,
+                        help='seconds between polls in watch mode (default: %(default)s)')
+    parser.add_argument('--stats', help='time every stage of the run and write the statistics to this JSON file')
+    parser.add_argument('--profile', help='run under cProfile and write its stats to this file')
+    parser.add_argument('-o', '--output', help='write results to this file instead of stdout')
+    args = parser.parse_args(argv)
+    if not args.paths and not (args.base and args.compare):
+        parser.error('give paths to compare all against all, or both --base and --compare')
+    if (args.corpus or args.watch) and not args.paths:
+        parser.error('--corpus and --watch take paths, not --base and --compare')
+    if args.watch:
+        args.corpus = args.corpus or Constants.CORPUS_PATH
+    return args
+
+def corpus_results(args):
+    """
+    Add the paths to the corpus session and yield the results of the new pairs.
+    """
+    session = CorpusSession(args.corpus, args.screen)
+    try:
+        pairs, retracted = session.update(collect_submissions(args.paths), skipped=report_skipped)
+        print(f'{len(session.files())} submissions in the corpus, {len(retracted)} pairs retracted, '
+              f'{len(pairs)} candidate pairs, {session.screened_out} pairs screened out', file=sys.stderr)
+        for _, base_file, compare_file, similarity, estimate, _ in session.compare(pairs, args.jobs, skipped=report_skipped_pair):
+            yield base_file, compare_file, similarity, estimate
+    finally:
+        session.close()
+
+def watch_results(args):
+    """
+    Poll the directories in paths until interrupted and yield the results of the pairs
+    of every new or changed file.
+    """
+    session = CorpusSession(args.corpus, args.screen)
+    watcher = DirectoryWatcher(session, args.paths)
+    try:
+        while True:
+            screened_out = session.screened_out
+            pairs, retracted = watcher.poll()
+            if pairs or retracted:
+                print(f'{len(session.files())} submissions in the corpus, {len(retracted)} pairs retracted, '
+                      f'{len(pairs)} candidate pairs, {session.screened_out - screened_out} pairs screened out',
+                      file=sys.stderr)
+            for _, base_file, compare_file, similarity, estimate, _ in session.compare(pairs, args.jobs, skipped=report_skipped_pair):
+                yield base_file, compare_file, similarity, estimate
+            time.sleep(args.interval)
+    finally:
+        session.close()
+
+def batch_results(args):
+    """
+    Compare the submissions given on the command line and yield the result of every pair.
+    """
+    if args.paths:
+        base_files = compare_files = collect_submissions(args.paths)
+    else:
+        base_files = collect_submissions(args.base)
+        compare_files = collect_submissions(args.compare)
+    pairs, signatures, duplicates, screened_out = candidate_pairs(base_files, compare_files, args.screen,
+                                                    all_pairs=bool(args.paths))
+    identical = duplicates.identical_pairs(base_files, compare_files, all_pairs=bool(args.paths))
+    print(f'{len(base_files)} base and {len(compare_files)} compare submissions, '
+          f'{len(duplicates.members)} distinct, {len(pairs)} candidate pairs, '
+          f'{screened_out} pairs screened out (--screen none compares them all)', file=sys.stderr)
+
+    for base_file, compare_file in identical:
+        yield base_file, compare_file, 1.0, 1.0
+    base_names, compare_names = set(base_files), set(compare_files)
+    for _, base_file, compare_file, similarity, _ in iter_compare_pairs(pairs, args.jobs, skipped=report_skipped_pair):
+        estimate = signatures.estimate(base_file, compare_file)
+        for base_copy, compare_copy in duplicates.expand(base_file, compare_file, base_names, compare_names):
+            yield base_copy, compare_copy, similarity, estimate
+
+def write_results(args):
+    if args.watch:
+        results = watch_results(args)
+    elif args.corpus:
+        results = corpus_results(args)
+    else:
+        results = batch_results(args)
+    output = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    try:
+        writer = ResultWriter(output, args.format)
+        for base_file, compare_file, similarity, estimate in results:
+            if similarity >= args.threshold:
+                with Profiling.stage('write'):
+                    writer.write(base_file, compare_file, similarity, estimate)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        results.close()
+        if args.output:
+            output.close()
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.stats:
+        Profiling.enable()
+    statistics = Profiling.reset()
+    start = time.perf_counter()
+    try:
+        with Profiling.capture(args.profile):
+            write_results(args)
+    finally:
+        if args.stats:
+            with open(args.stats, 'w', encoding='utf-8') as output:
+                json.dump({'seconds': time.perf_counter() - start, **statistics.to_record()}, output, indent=1)
+
+if __name__ == '__main__':
+    main()
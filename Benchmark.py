@@ -0,0 +1,217 @@
+"""
+Benchmarks the engine on synthetic corpora: families of plagiarized copies generated
+from seed files and synthesized programs (see engine.Synthetic). For every corpus size
+it reports the throughput and the precision and recall of the pairwise engines on a
+sample of plagiarized and independent pairs, of the candidate screens over the whole
+corpus, and of the screen + line similarity pipeline BatchCheck runs.
+
+    python Benchmark.py --sizes 10 100 1000 10000 --seeds test/test1.py test/test2.py
+    python Benchmark.py --sizes 100 --json benchmark.json --output corpus/
+    python Benchmark.py --sizes 10 --memory 200
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+import Constants
+from engine.AST import PreparedDocument, calculate_overall_similarity, find_similar_blocks, merge_spans
+from engine.Fingerprint import FingerprintIndex
+from engine.LineSimilarity import LineIndex, line_similarity
+from engine.MinHash import MinHashLSH
+from engine.Synthetic import generate_corpus, plagiarized_pairs
+
+def block_coverage(content1, content2):
+    """
+    Share of the non-blank lines of content1 covered by blocks matched in content2.
+    """
+    similar_blocks, blocks1, _ = find_similar_blocks(content1, content2)
+    covered = sum(end - start + 1 for start, end in merge_spans(
+        (blocks1[i].lineno, blocks1[i].end_lineno) for i, _, _ in similar_blocks))
+    lines = sum(1 for line in content1.splitlines() if line.strip())
+    return min(1.0, covered / lines) if lines else 0.0
+
+PAIR_ENGINES = {
+    'find_similar_blocks': block_coverage,
+    'calculate_overall_similarity': lambda content1, content2: calculate_overall_similarity(
+        content1.splitlines(), content2.splitlines()),
+    'line_similarity': lambda content1, content2: line_similarity(content1.splitlines(), content2.splitlines()),
+}
+
+def precision_recall(predicted, actual):
+    true_positives = len(predicted & actual)
+    precision = true_positives / len(predicted) if predicted else 1.0
+    recall = true_positives / len(actual) if actual else 1.0
+    return precision, recall
+
+def sample_pairs(files, positives, count, rng):
+    """
+    Return up to count plagiarized and count independent pairs of files.
+    """
+    plagiarized = sorted(positives)
+    plagiarized = rng.sample(plagiarized, min(count, len(plagiarized)))
+    independent = set()
+    attempts = 0
+    while len(independent) < count and attempts < count * 20:
+        attempts += 1
+        file1, file2 = sorted(rng.sample(files, 2), key=lambda file: file.name)
+        if file1.family != file2.family:
+            independent.add((file1.name, file2.name))
+    return plagiarized + sorted(independent)
+
+def bench_pair_engine(name, engine, pairs, contents, positives, threshold):
+    start = time.perf_counter()
+    flagged = {pair for pair in pairs if engine(contents[pair[0]], contents[pair[1]]) >= threshold}
+    elapsed = time.perf_counter() - start
+    precision, recall = precision_recall(flagged, positives & set(pairs))
+    return {'engine': name, 'scope': f'{len(pairs)} sampled pairs', 'seconds': elapsed,
+            'throughput': len(pairs) / elapsed if elapsed else 0, 'unit': 'pairs/s',
+            'precision': precision, 'recall': recall}
+
+def screen_candidates(screen, files, contents):
+    names = [file.name for file in files]
+    if screen == 'winnowing':
+        index = FingerprintIndex()
+        for name in names:
+            index.add(name, contents[name])
+    else:
+        index = MinHashLSH()
+        for name in names:
+            index.add(name, contents[name])
+    return {(name, other) for position, name in enumerate(names)
+            for other in index.candidates(name, names[position + 1:])}
+
+def bench_screen(screen, files, contents, positives):
+    start = time.perf_counter()
+    candidates = screen_candidates(screen, files, contents)
+    elapsed = time.perf_counter() - start
+    precision, recall = precision_recall(candidates, positives)
+    return {'engine': f'{screen} screen', 'scope': f'{len(files)} files, {len(candidates)} candidates',
+            'seconds': elapsed, 'throughput': len(files) / elapsed if elapsed else 0, 'unit': 'files/s',
+            'precision': precision, 'recall': recall}
+
+def bench_pipeline(files, contents, positives, threshold, max_pairs):
+    """
+    Winnowing screen, then line similarity on the candidates like BatchCheck, in one process.
+    """
+    start = time.perf_counter()
+    candidates = sorted(screen_candidates('winnowing', files, contents))
+    if len(candidates) > max_pairs:
+        print(f'Skipping the pipeline at {len(files)} files: {len(candidates)} candidate pairs '
+              f'(raise --max-pipeline-pairs to run it)', file=sys.stderr)
+        return None
+    indexes = {}
+    flagged = set()
+    for name1, name2 in candidates:
+        if name2 not in indexes:
+            indexes[name2] = LineIndex(contents[name2].splitlines())
+        if line_similarity(contents[name1].splitlines(), None, indexes[name2]) >= threshold:
+            flagged.add((name1, name2))
+    elapsed = time.perf_counter() - start
+    precision, recall = precision_recall(flagged, positives)
+    return {'engine': 'winnowing + line_similarity', 'scope': f'{len(files)} files, {len(candidates)} pairs',
+            'seconds': elapsed, 'throughput': len(files) / elapsed if elapsed else 0, 'unit': 'files/s',
+            'precision': precision, 'recall': recall}
+
+def bench_memory(files, contents):
+    """
+    Memory the prepared documents of files keep alive, and the median peak while preparing one.
+    """
+    PreparedDocument(contents[files[0].name])  # imports astor outside the measurement
+    tracemalloc.start()
+    try:
+        documents = []
+        peaks = []
+        for file in files:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            try:
+                documents.append(PreparedDocument(contents[file.name]))
+            except SyntaxError:
+                continue
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    statements = sum(map(len, documents))
+    return {'files': len(documents), 'statements': statements,
+            'retained_per_file': retained / len(documents) if documents else 0,
+            'retained_per_statement': retained / statements if statements else 0,
+            'peak_per_file': statistics.median(peaks) if peaks else 0}
+
+def write_corpus(files, directory):
+    os.makedirs(directory, exist_ok=True)
+    for file in files:
+        with open(os.path.join(directory, file.name), 'w', encoding='utf-8') as output:
+            output.write(file.content)
+    with open(os.path.join(directory, 'families.json'), 'w', encoding='utf-8') as output:
+        json.dump({file.name: {'family': file.family, 'mutations': list(file.mutations)} for file in files},
+                  output, indent=1)
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Benchmark the engine on synthetic plagiarism corpora.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000], help='corpus sizes in files')
+    parser.add_argument('--seeds', nargs='*', default=['test/test1.py', 'test/test4.py'],
+                        help='files the first families are copied from; give unrelated files')
+    parser.add_argument('--engines', nargs='+', default=list(PAIR_ENGINES), choices=list(PAIR_ENGINES),
+                        help='pairwise engines to time on sampled pairs')
+    parser.add_argument('--sample', type=int, default=20,
+                        help='plagiarized and independent pairs each given to the pairwise engines')
+    parser.add_argument('--threshold', type=float, default=Constants.SUS_THRESHOLD,
+                        help='score at which a pair counts as detected (default: %(default)s)')
+    parser.add_argument('--max-pipeline-pairs', type=int, default=1000,
+                        help='skip the pipeline when the screen leaves more candidate pairs than this')
+    parser.add_argument('--memory', type=int, default=0, metavar='FILES',
+                        help='also measure the memory of the prepared documents of this many files')
+    parser.add_argument('--random-seed', type=int, default=0)
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--output', help='write the largest corpus and its families.json to this directory')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    generated = max(args.sizes + [args.memory])
+    print(f'Generating {generated} files...', file=sys.stderr)
+    start = time.perf_counter()
+    corpus = generate_corpus(generated, args.seeds, seed=args.random_seed)
+    print(f'Generated in {time.perf_counter() - start:.1f}s', file=sys.stderr)
+    if args.output:
+        write_corpus(corpus, args.output)
+    contents = {file.name: file.content for file in corpus}
+
+    results = []
+    print(f'{"files":>6}  {"engine":<30} {"scope":<32} {"throughput":>16} {"precision":>9} {"recall":>7}')
+    for size in sorted(args.sizes):
+        files = corpus[:size]  # families are contiguous, so smaller corpora keep whole families
+        positives = plagiarized_pairs(files)
+        pairs = sample_pairs(files, positives, args.sample, random.Random(args.random_seed))
+        rows = [bench_pair_engine(name, PAIR_ENGINES[name], pairs, contents, positives, args.threshold)
+                for name in args.engines]
+        rows += [bench_screen(screen, files, contents, positives) for screen in ('winnowing', 'minhash')]
+        pipeline = bench_pipeline(files, contents, positives, args.threshold, args.max_pipeline_pairs)
+        if pipeline is not None:
+            rows.append(pipeline)
+        for row in rows:
+            row['files'] = size
+            print(f'{size:>6}  {row["engine"]:<30} {row["scope"]:<32} '
+                  f'{row["throughput"]:>9.1f} {row["unit"]:<7}{row["precision"]:>9.3f}{row["recall"]:>8.3f}')
+        results.extend(rows)
+
+    memory = None
+    if args.memory:
+        memory = bench_memory(corpus[:args.memory], contents)
+        print(f'Prepared documents of {memory["files"]} files: {memory["retained_per_file"] / 1024:.1f} KiB '
+              f'retained per file ({memory["retained_per_statement"]:.0f} B per statement), '
+              f'median peak {memory["peak_per_file"] / 1024:.0f} KiB while preparing one')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({'threshold': args.threshold, 'seeds': args.seeds, 'results': results, 'memory': memory},
+                      output, indent=1)
+
+if __name__ == '__main__':
+    main()
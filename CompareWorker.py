@@ -0,0 +1,97 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+import Constants
+from engine import Profiling
+from engine.AnalysisCache import get_cache
+from engine.Fingerprint import FingerprintIndex
+from engine.MinHash import MinHashLSH
+from engine.ParallelCompare import iter_compare_pairs
+from engine.Submissions import READ_ERRORS, DuplicateGroups, read_submission, submission_hash
+
+
+class CompareWorker(QThread):
+    """
+    Screens and compares the selected files off the GUI thread, streaming every
+    finished pair back through result. Files with identical contents are analyzed
+    once and their results repeated for every copy. Files that cannot be read are
+    skipped and listed in skipped.
+    """
+    indexing = pyqtSignal(int, int)  # files indexed, total files
+    progress = pyqtSignal(int, int)  # pairs compared, total pairs
+    # pair index, base, compare, similarity, estimate, compact block matches or None
+    result = pyqtSignal(int, str, str, float, float, object)
+
+    def __init__(self, base_files, compare_files, parent=None, screen=Constants.CANDIDATE_SCREEN):
+        super().__init__(parent)
+        self.base_files = base_files
+        self.compare_files = compare_files
+        self.screen = screen
+        self.total_pairs = 0
+        self.screened_out = 0  # pairs the candidate screen left out of the full comparison
+        self.cancelled = False
+        self.skipped = []  # "file: error" of every file or pair that could not be read
+        self.error = None  # message of the error that stopped the comparison
+
+    def run(self):
+        # An exception leaving run() would abort the whole application
+        try:
+            with Profiling.capture(Constants.CPROFILE_PATH):
+                self.compare()
+        except Exception as error:
+            self.error = f'{type(error).__name__}: {error}'
+
+    def skip_pair(self, base_file, compare_file, error):
+        self.skipped.append(f'{base_file} x {compare_file}: {error}')
+
+    def compare(self):
+        files = list(dict.fromkeys(self.base_files + self.compare_files))
+        cache = get_cache()
+        fingerprints = FingerprintIndex()
+        signatures = MinHashLSH()
+        duplicates = DuplicateGroups()
+        for done, file in enumerate(files, 1):
+            if self.isInterruptionRequested():
+                return
+            try:
+                content = read_submission(file)
+                digest = submission_hash(file)
+            except READ_ERRORS as error:
+                self.skipped.append(f'{file}: {error}')
+                continue
+            if duplicates.add(file, digest):
+                if self.screen == 'winnowing':
+                    fingerprints.add(file, content, cache.fingerprints(content))
+                signatures.add(file, content)
+            self.indexing.emit(done, len(files))
+
+        screen = {'winnowing': fingerprints, 'minhash': signatures}.get(self.screen)
+        base_files = duplicates.unique(self.base_files)
+        compare_files = duplicates.unique(self.compare_files)
+        pairs = []
+        for base_file in base_files:
+            others = [compare_file for compare_file in compare_files if compare_file != base_file]
+            candidates = others if screen is None else screen.candidates(base_file, others)
+            self.screened_out += len(others) - len(candidates)
+            pairs.extend((base_file, compare_file) for compare_file in candidates)
+        identical = duplicates.identical_pairs(self.base_files, self.compare_files)
+        base_names, compare_names = set(self.base_files), set(self.compare_files)
+        copies = {pair: list(duplicates.expand(*pair, base_names, compare_names)) for pair in pairs}
+        self.total_pairs = len(identical) + sum(map(len, copies.values()))
+        self.progress.emit(0, self.total_pairs)
+
+        # Copies of one file come first, then the compared pairs in their pair order
+        for index, (base_file, compare_file) in enumerate(identical):
+            self.result.emit(index, base_file, compare_file, 1.0, 1.0, None)
+        done = len(identical)
+        results = iter_compare_pairs(pairs, precompute_blocks=Constants.PRECOMPUTE_BLOCKS, skipped=self.skip_pair)
+        try:
+            for index, base_file, compare_file, similarity, blocks in results:
+                estimate = signatures.estimate(base_file, compare_file)
+                for base_copy, compare_copy in copies[base_file, compare_file]:
+                    self.result.emit(len(identical) + index, base_copy, compare_copy, similarity, estimate, blocks)
+                done += len(copies[base_file, compare_file])
+                self.progress.emit(done, self.total_pairs)
+                if self.isInterruptionRequested():
+                    return
+        finally:
+            results.close()
@@ -1 +1,48 @@
 SUS_THRESHOLD = 0.6  # float between 0 and 1
+
+WINNOW_K = 12  # tokens per k-gram
+WINNOW_WINDOW = 8  # k-gram hashes per winnowing window
+FINGERPRINT_THRESHOLD = 0.1  # share of fingerprints two files need in common to be compared in detail
+
+MINHASH_SHINGLE = 5  # tokens per shingle
+MINHASH_PERMUTATIONS = 128  # signature length
+MINHASH_THRESHOLD = 0.25  # estimated Jaccard similarity a pair needs to become a candidate
+CANDIDATE_SCREEN = 'winnowing'  # 'winnowing', 'minhash' or 'none'; a screen can miss heavily edited copies
+
+COMPARE_WORKERS = None  # worker processes for batch comparisons, None uses every CPU core
+COMPARE_CHUNK_SIZE = 8  # pairs sent to a worker at a time
+
+HIERARCHICAL_MATCHING = True  # statements nested in a matched statement are not compared again
+
+NODE_TYPE_BLOCKING = True  # only compare statements of the same kind
+STATEMENT_KINDS = {  # statement types compared with each other, other types only match their own type
+    'For': 'loop', 'AsyncFor': 'loop', 'While': 'loop',
+    'FunctionDef': 'function', 'AsyncFunctionDef': 'function',
+    'With': 'with', 'AsyncWith': 'with',
+    'Assign': 'assignment', 'AugAssign': 'assignment', 'AnnAssign': 'assignment',
+    'Import': 'import', 'ImportFrom': 'import',
+}
+
+CACHE_PATH = 'analysis_cache.sqlite'  # on-disk cache of prepared documents and block matches
+CACHE_MAX_BYTES = 256 * 1024 * 1024  # least recently used records are evicted above this size
+
+HISTORY_PATH = 'history.sqlite'  # comparison history of every user
+LEGACY_HISTORY_PATH = 'history.json'  # imported into HISTORY_PATH the first time it is created
+
+HISTORY_PAGE_SIZE = 200  # history rows fetched at a time while scrolling
+
+PRECOMPUTE_BLOCKS = True  # compute block matches of suspicious pairs during the batch run
+
+LINE_NGRAM = 3  # characters per n-gram in the line index
+LINE_CANDIDATES = 8  # best n-gram candidates scored per line
+
+STARTUP_BUDGET_MS = 250  # longest acceptable import time of the login screen, checked by StartupCheck.py
+
+EXPORT_COMPRESSION = 'deflate'  # 'deflate', 'lzma' (smaller, slower) or 'store' for exported archives
+
+CORPUS_PATH = 'corpus.sqlite'  # persistent corpus session for incremental re-checks
+
+WATCH_INTERVAL = 5  # seconds between polls of a watched folder
+
+PROFILING = False  # time every stage of a run and count its work, see engine/Profiling.py
+CPROFILE_PATH = None  # when set, comparisons in the GUI run under cProfile and dump their stats here
@@ -0,0 +1,71 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+import Constants
+from engine import Profiling
+
+
+class CorpusWorker(QThread):
+    """
+    Adds files to the corpus session off the GUI thread, comparing only the new and
+    changed files against the index and streaming their pairs back through result.
+    With a DirectoryWatcher instead of files, one poll of the watched folders is applied.
+    Files that cannot be read are skipped and listed in skipped.
+    """
+    indexing = pyqtSignal(int, int)  # files read, total files
+    progress = pyqtSignal(int, int)  # pairs compared, total pairs
+    retracted = pyqtSignal(object)  # (base_file, compare_file) keys of pairs dropped by a change
+    # pair index, base, compare, similarity, estimate, compact block matches or None
+    result = pyqtSignal(int, str, str, float, float, object)
+
+    def __init__(self, session, files, parent=None, watcher=None):
+        super().__init__(parent)
+        self.session = session
+        self.files = files
+        self.watcher = watcher
+        self.total_pairs = 0
+        self.cancelled = False
+        self.idle = False  # a poll of the watched folders that found nothing to do
+        self.screened_out = 0  # pairs the candidate screen left out of the full comparison
+        self.skipped = []  # "file: error" of every file or pair that could not be read
+        self.error = None  # message of the error that stopped the update
+
+    def run(self):
+        # An exception leaving run() would abort the whole application
+        try:
+            with Profiling.capture(Constants.CPROFILE_PATH):
+                self.compare()
+        except Exception as error:
+            self.error = f'{type(error).__name__}: {error}'
+
+    def skip_file(self, name, error):
+        self.skipped.append(f'{name}: {error}')
+
+    def skip_pair(self, base_file, compare_file, error):
+        self.skipped.append(f'{base_file} x {compare_file}: {error}')
+
+    def compare(self):
+        screened_out = self.session.screened_out
+        if self.watcher is not None:
+            changed, removed = self.watcher.changes()
+            if not changed and not removed:
+                self.idle = True
+                return
+            # The statistics of the last run are kept until a poll has work to do
+            Profiling.reset()
+            pairs, retracted = self.watcher.poll(self.indexing.emit, (changed, removed))
+        else:
+            pairs, retracted = self.session.update(self.files, self.indexing.emit, skipped=self.skip_file)
+        self.screened_out = self.session.screened_out - screened_out
+        self.retracted.emit(retracted)
+        self.total_pairs = len(pairs)
+        self.progress.emit(0, len(pairs))
+
+        results = self.session.compare(pairs, precompute_blocks=Constants.PRECOMPUTE_BLOCKS, skipped=self.skip_pair)
+        try:
+            for done, result in enumerate(results, 1):
+                self.result.emit(*result)
+                self.progress.emit(done, len(pairs))
+                if self.isInterruptionRequested():
+                    return
+        finally:
+            results.close()
@@ -1,25 +1,100 @@
-from PyQt5.QtWidgets import QTextEdit, QHBoxLayout, QWidget, QMainWindow
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor, QFontDatabase, QTextCharFormat, QTextCursor, QTextFormat
+from PyQt5.QtWidgets import QPlainTextEdit, QTextEdit, QHBoxLayout, QVBoxLayout, QWidget, QMainWindow, QPushButton, \
+    QCheckBox, QLabel
+
+from engine.AST import highlight_ranges
 
 
 class DiffWindow(QMainWindow):
-    def __init__(self, parent, highlighted_content1: str, highlighted_content2: str):
+    def __init__(self, parent, content1: str, content2: str, similar_blocks, blocks1, blocks2):
         super().__init__(parent)
         self.setGeometry(400, 400, 2000, 1000)
         self.setWindowTitle('Code Comparison')
 
-        diff_text_edit1 = QTextEdit(self)
-        diff_text_edit1.setHtml(highlighted_content1)
-        diff_text_edit1.setReadOnly(True)
+        # Matched block pairs in reading order of the left file, for navigation
+        self.matches = sorted((blocks1[i].lineno, blocks2[j].lineno) for i, j, _ in similar_blocks)
+        self.current_match = -1
+        self.syncing = False
+
+        spans1 = [(blocks1[i].lineno, blocks1[i].end_lineno) for i, _, _ in similar_blocks]
+        spans2 = [(blocks2[j].lineno, blocks2[j].end_lineno) for _, j, _ in similar_blocks]
+        self.diff_text_edit1 = self.create_editor(content1, spans1)
+        self.diff_text_edit2 = self.create_editor(content2, spans2)
+
+        scroll_bar1 = self.diff_text_edit1.verticalScrollBar()
+        scroll_bar2 = self.diff_text_edit2.verticalScrollBar()
+        scroll_bar1.valueChanged.connect(lambda value: self.sync_scroll(scroll_bar2, value))
+        scroll_bar2.valueChanged.connect(lambda value: self.sync_scroll(scroll_bar1, value))
+
+        self.sync_check = QCheckBox('Synchronize scrolling', self)
+        self.sync_check.setChecked(True)
+        previous_button = QPushButton('Previous Match', self)
+        previous_button.clicked.connect(lambda: self.jump_to_match(-1))
+        next_button = QPushButton('Next Match', self)
+        next_button.clicked.connect(lambda: self.jump_to_match(1))
+        self.match_label = QLabel(f'{len(self.matches)} matches', self)
+
+        toolbar = QHBoxLayout()
+        toolbar.addWidget(previous_button)
+        toolbar.addWidget(next_button)
+        toolbar.addWidget(self.match_label)
+        toolbar.addStretch()
+        toolbar.addWidget(self.sync_check)
 
-        diff_text_edit2 = QTextEdit(self)
-        diff_text_edit2.setHtml(highlighted_content2)
-        diff_text_edit2.setReadOnly(True)
+        editors = QHBoxLayout()
+        editors.addWidget(self.diff_text_edit1)
+        editors.addWidget(self.diff_text_edit2)
 
-        layout = QHBoxLayout()
-        layout.addWidget(diff_text_edit1)
-        layout.addWidget(diff_text_edit2)
+        layout = QVBoxLayout()
+        layout.addLayout(toolbar)
+        layout.addLayout(editors)
         container = QWidget()
         container.setLayout(layout)
         self.setCentralWidget(container)
 
         self.show()
+
+    def create_editor(self, content, spans):
+        editor = QPlainTextEdit(self)
+        editor.setReadOnly(True)
+        editor.setLineWrapMode(QPlainTextEdit.NoWrap)
+        editor.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        editor.setPlainText(content)
+
+        highlight = QTextCharFormat()
+        highlight.setBackground(QColor(Qt.yellow))
+        highlight.setProperty(QTextFormat.FullWidthSelection, True)
+        document = editor.document()
+        selections = []
+        for first, last in highlight_ranges(content, spans):
+            selection = QTextEdit.ExtraSelection()
+            selection.format = highlight
+            selection.cursor = QTextCursor(document.findBlockByNumber(first - 1))
+            end = document.findBlockByNumber(last - 1)
+            selection.cursor.setPosition(end.position() + end.length() - 1, QTextCursor.KeepAnchor)
+            selections.append(selection)
+        editor.setExtraSelections(selections)
+        return editor
+
+    def sync_scroll(self, other, value):
+        if self.syncing or not self.sync_check.isChecked():
+            return
+        self.syncing = True
+        other.setValue(value)
+        self.syncing = False
+
+    def jump_to_match(self, step):
+        if not self.matches:
+            return
+        self.current_match = (self.current_match + step) % len(self.matches)
+        line1, line2 = self.matches[self.current_match]
+        self.syncing = True
+        self.scroll_to_line(self.diff_text_edit1, line1)
+        self.scroll_to_line(self.diff_text_edit2, line2)
+        self.syncing = False
+        self.match_label.setText(f'Match {self.current_match + 1} of {len(self.matches)}')
+
+    def scroll_to_line(self, editor, line):
+        editor.setTextCursor(QTextCursor(editor.document().findBlockByNumber(line - 1)))
+        editor.verticalScrollBar().setValue(line - 1)
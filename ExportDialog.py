@@ -1,10 +1,10 @@
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QCheckBox, QDialogButtonBox
 
 
-class FileSelectionDialog2(QDialog):
-    def __init__(self, files, parent=None):
+class ExportDialog(QDialog):
+    def __init__(self, files, parent=None, title='Select Files to Export'):
         super().__init__(parent)
-        self.setWindowTitle('Select Files to Export')
+        self.setWindowTitle(title)
         self.layout = QVBoxLayout(self)
         self.checkboxes = []
 
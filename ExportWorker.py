@@ -0,0 +1,27 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from engine.Export import export_submissions, pair_record
+
+
+class ExportWorker(QThread):
+    """
+    Writes the selected files and a manifest of their pair results to a zip archive
+    off the GUI thread.
+    """
+    progress = pyqtSignal(int, int)  # files written, total files
+
+    def __init__(self, path, files, results, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.files = files
+        # (base, compare, similarity, estimate, status, compact block matches or None)
+        self.results = results
+        self.stored = 0  # distinct contents written
+        self.error = None  # message of the error that stopped the export
+
+    def run(self):
+        try:
+            pairs = [pair_record(*result) for result in self.results]
+            self.stored = export_submissions(self.path, self.files, pairs, progress=self.progress.emit)
+        except Exception as error:
+            self.error = f'{type(error).__name__}: {error}'
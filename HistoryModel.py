@@ -0,0 +1,83 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
+from PyQt5.QtGui import QColor
+
+import Constants
+from engine.HistoryStore import HistoryStore
+
+
+class HistoryModel(QAbstractTableModel):
+    """
+    One user's history, fetched from the HistoryStore a page at a time as the view
+    scrolls. Sorting and filtering are done by the query.
+    """
+    HEADERS = ('Timestamp', 'Base', 'Compare', 'Similarity')
+
+    def __init__(self, store: HistoryStore, username, page_size=Constants.HISTORY_PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.username = username
+        self.page_size = page_size
+        self.order_by = 'timestamp'
+        self.descending = True
+        self.filter_text = ''
+        self.rows = []
+        self.total = self.store.count(self.username)
+        self.fetchMore()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return QVariant()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        row = self.rows[index.row()]
+        similarity = row[3]
+        if role == Qt.DisplayRole:
+            if index.column() == 3:
+                return f'{similarity * 100:.2f}%'
+            return row[index.column()]
+        if role == Qt.BackgroundRole and similarity > Constants.SUS_THRESHOLD:
+            return QColor(Qt.red)
+        return QVariant()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and len(self.rows) < self.total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        page = self.store.page(self.username, self.page_size, self.order_by, self.descending, self.filter_text,
+                               self.rows[-1] if self.rows else None)
+        if not page:
+            self.total = len(self.rows)
+            return
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+        self.rows.extend(page)
+        self.endInsertRows()
+
+    def reload(self):
+        self.beginResetModel()
+        self.rows = []
+        self.total = self.store.count(self.username, self.filter_text)
+        self.endResetModel()
+        self.fetchMore()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.order_by = HistoryStore.COLUMNS[column]
+        self.descending = order == Qt.DescendingOrder
+        self.reload()
+
+    def set_filter(self, text):
+        self.filter_text = text.strip()
+        self.reload()
+
+    def record(self, row):
+        return dict(zip(HistoryStore.COLUMNS, self.rows[row]))
@@ -3,7 +3,6 @@ import datetime
 from PyQt5.QtGui import QIcon
 
 from RegisterDialog import load_user_data
-from MainWindow import MainWindow
 from RegisterDialog import RegisterDialog
 from PyQt5.QtWidgets import QMainWindow, QPushButton, QLineEdit, QLabel, QVBoxLayout, QWidget, QVBoxLayout, QPushButton, QMessageBox
 
@@ -55,6 +54,7 @@ class LoginWindow(QMainWindow):
         if username in user_data and user_data[username] == password:
             login_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             print(f'User {username} logged in at {login_time}')
+            from MainWindow import MainWindow  # the comparison UI and engine load only after login
             self.main_window = MainWindow(username, login_time)
             self.main_window.show()
             self.close()
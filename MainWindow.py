@@ -1,21 +1,19 @@
-import ast
-import zipfile
+import time
+from contextlib import contextmanager
 
-import astor
-import json
-import datetime
-from difflib import SequenceMatcher
-
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QIcon
 
 import Constants
+from engine import Profiling
+from engine.Submissions import collect_submissions, read_submission
 from DiffWindow import DiffWindow
-from FileSelectionDialog import FileSelectionDialog
 from ExportDialog import ExportDialog
-from HistoryWindow import HistoryWindow
-from PyQt5.QtWidgets import QMainWindow, QPushButton, QLabel, QVBoxLayout, QWidget, QFileDialog, QListWidget, QTextEdit, \
-    QVBoxLayout, QPushButton, QListWidgetItem, QHBoxLayout, QMenu
+from FileSelectionDialog import FileSelectionDialog
+from ResultModel import ResultModel, ResultFilterProxy, SUSPICIOUS, MARKED, UNMARKED
+from PyQt5.QtWidgets import QMainWindow, QPushButton, QLabel, QVBoxLayout, QWidget, QFileDialog, QTextEdit, \
+    QVBoxLayout, QPushButton, QHBoxLayout, QMenu, QTableView, QAbstractItemView, QHeaderView, QDoubleSpinBox, \
+    QCheckBox
 
 
 class MainWindow(QMainWindow):
@@ -23,7 +21,17 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.username = username
         self.login_time = login_time
-        self.suspicious_code_blocks = []  # Store suspicious code blocks
+        self.worker = None  # CompareWorker of the running comparison
+        self.export_worker = None  # ExportWorker of the running export
+        self.corpus = None  # CorpusSession, opened on first use
+        self.showing_corpus = False  # whether the result table holds the corpus pairs
+        self.pair_offset = 0  # pair index of the first result of the running comparison
+        self.run_results = []  # (pair index, base_file, compare_file, similarity) of the running comparison
+        self.watcher = None  # DirectoryWatcher of the watched folder
+        self.run_started = self.run_seconds = 0.0  # when the last run started, and how long it took
+        self.watch_timer = QTimer(self)
+        self.watch_timer.timeout.connect(self.poll_watched_folder)
+        self.imported_files = []
         self.initUI()
 
     def initUI(self):
@@ -37,6 +45,18 @@ class MainWindow(QMainWindow):
         self.import_button.clicked.connect(self.import_files)
         layout.addWidget(self.import_button)
 
+        corpus_layout = QHBoxLayout()
+        self.corpus_add_button = QPushButton('Add Files to Corpus', self)
+        self.corpus_add_button.clicked.connect(self.add_to_corpus)
+        corpus_layout.addWidget(self.corpus_add_button)
+        self.corpus_remove_button = QPushButton('Remove Files from Corpus', self)
+        self.corpus_remove_button.clicked.connect(self.remove_from_corpus)
+        corpus_layout.addWidget(self.corpus_remove_button)
+        self.watch_button = QPushButton('Watch Folder', self)
+        self.watch_button.clicked.connect(self.toggle_watch)
+        corpus_layout.addWidget(self.watch_button)
+        layout.addLayout(corpus_layout)
+
         self.history_button = QPushButton('History', self)
         self.history_button.clicked.connect(self.show_history)
         layout.addWidget(self.history_button)
@@ -45,70 +65,298 @@ class MainWindow(QMainWindow):
         self.export_button.clicked.connect(self.export_suspicious_code)
         layout.addWidget(self.export_button)
 
+        statistics_layout = QHBoxLayout()
+        self.statistics_box = QCheckBox('Collect run statistics', self)
+        self.statistics_box.setChecked(Profiling.enabled)
+        self.statistics_box.toggled.connect(Profiling.enable)
+        statistics_layout.addWidget(self.statistics_box)
+        self.statistics_button = QPushButton('Run Statistics', self)
+        self.statistics_button.clicked.connect(self.show_run_statistics)
+        statistics_layout.addWidget(self.statistics_button)
+        layout.addLayout(statistics_layout)
+
+        self.cancel_button = QPushButton('Cancel Comparison', self)
+        self.cancel_button.clicked.connect(self.cancel_comparison)
+        self.cancel_button.setEnabled(False)
+        layout.addWidget(self.cancel_button)
+
         self.login_time_label = QLabel(f'Login Time: {self.login_time}                                                                 ', self)
         layout.addWidget(self.login_time_label)
 
         self.result_label = QLabel('<span style="color:red">Items in yellow are suspicious, please check manually.</span>', self)
         layout.addWidget(self.result_label)
 
-        self.result_list = QListWidget(self)
-        self.result_list.itemClicked.connect(self.view_details)
-        self.result_list.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.result_list.customContextMenuRequested.connect(self.show_context_menu)
-        layout.addWidget(self.result_list)
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel('Show pairs at least this similar:', self))
+        self.threshold_box = QDoubleSpinBox(self)
+        self.threshold_box.setRange(0, 100)
+        self.threshold_box.setSuffix('%')
+        self.threshold_box.valueChanged.connect(self.filter_results)
+        filter_layout.addWidget(self.threshold_box)
+        self.screen_box = QCheckBox('Screen candidate pairs (faster, can miss heavily edited copies)', self)
+        self.screen_box.setChecked(Constants.CANDIDATE_SCREEN != 'none')
+        filter_layout.addWidget(self.screen_box)
+        filter_layout.addStretch()
+        layout.addLayout(filter_layout)
+
+        self.result_model = ResultModel(self)
+        self.result_proxy = ResultFilterProxy(self)
+        self.result_proxy.setSourceModel(self.result_model)
+        self.result_table = QTableView(self)
+        self.result_table.setModel(self.result_proxy)
+        self.result_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.result_table.setSortingEnabled(True)
+        self.result_table.sortByColumn(-1, Qt.AscendingOrder)  # pair order until a column is clicked
+        self.result_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.result_table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.result_table.horizontalHeader().setStretchLastSection(True)
+        self.result_table.clicked.connect(self.view_details)
+        self.result_table.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.result_table.customContextMenuRequested.connect(self.show_context_menu)
+        layout.addWidget(self.result_table)
 
         self.setCentralWidget(central_widget)
 
         self.statusBar().showMessage('Ready')
 
-    def import_files(self):
+    def choose_files(self):
         options = QFileDialog.Options()
-        files, _ = QFileDialog.getOpenFileNames(self, "Import Code Files", "", "Python Files (*.py);;All Files (*)",
-                                                options=options)
-        if len(files) >= 2:
-            self.imported_files = files  # Store all imported files
-            dialog = FileSelectionDialog(files, self)
-            if dialog.exec_():
-                base_files = dialog.selected_base_files
-                compare_files = dialog.selected_compare_files
-                if base_files and compare_files:
-                    duplicates = []
-                    for base_file in base_files:
-                        self.compare_files(base_file, compare_files, duplicates)
-                    self.display_results(duplicates)
+        files, _ = QFileDialog.getOpenFileNames(self, "Import Code Files", "",
+                                                "Code Files and Zip Archives (*.py *.zip);;Python Files (*.py);;"
+                                                "Zip Archives (*.zip);;All Files (*)", options=options)
+        # Zip archives are read in place, one submission per Python member
+        return collect_submissions(files)
+
+    @contextmanager
+    def watch_paused(self):
+        """
+        Stop polling the watched folder while a dialog is open, so that no CorpusWorker
+        starts, or changes the corpus, behind it.
+        """
+        active = self.watch_timer.isActive()
+        self.watch_timer.stop()
+        try:
+            yield
+        finally:
+            if active and self.watcher is not None:
+                self.watch_timer.start()
+
+    def import_files(self):
+        with self.watch_paused():
+            files = self.choose_files()
+            if len(files) >= 2:
+                self.imported_files = files  # Store all imported files
+                dialog = FileSelectionDialog(files, self)
+                if dialog.exec_():
+                    base_files = dialog.selected_base_files
+                    compare_files = dialog.selected_compare_files
+                    if base_files and compare_files:
+                        self.compare_files(base_files, compare_files)
+            else:
+                self.statusBar().showMessage('Please select at least 2 files')
+
+    def compare_files(self, base_files, compare_files):
+        from CompareWorker import CompareWorker
+        self.result_model.clear()
+        self.showing_corpus = False
+        self.pair_offset = 0
+        self.start_worker(CompareWorker(base_files, compare_files, self, self.candidate_screen()))
+
+    def candidate_screen(self):
+        if not self.screen_box.isChecked():
+            return 'none'
+        return Constants.CANDIDATE_SCREEN if Constants.CANDIDATE_SCREEN != 'none' else 'winnowing'
+
+    def start_worker(self, worker, reset_statistics=True):
+        self.worker = worker
+        self.run_results = []
+        self.worker.indexing.connect(self.show_indexing)
+        self.worker.progress.connect(self.show_progress)
+        self.worker.result.connect(self.add_result)
+        self.worker.finished.connect(self.comparison_finished)
+        self.import_button.setEnabled(False)
+        self.corpus_add_button.setEnabled(False)
+        self.corpus_remove_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.compare_started = self.run_started = time.monotonic()
+        if reset_statistics:
+            Profiling.reset()
+        self.worker.start()
+
+    def add_result(self, pair_index, base_file, compare_file, similarity, estimate, blocks):
+        with Profiling.stage('result_view'):
+            self.result_model.add_result(self.pair_offset + pair_index, base_file, compare_file, similarity,
+                                         estimate, blocks)
+        self.run_results.append((self.pair_offset + pair_index, base_file, compare_file, similarity))
+
+    def open_corpus(self):
+        """
+        Open the corpus session and show its stored pairs, unless they are shown already.
+        """
+        if self.corpus is None:
+            from engine.Corpus import CorpusSession
+            self.corpus = CorpusSession()
+        if not self.showing_corpus:
+            self.result_model.clear()
+            pairs = self.corpus.pairs()
+            for pair_index, (base_file, compare_file, similarity, estimate) in enumerate(pairs):
+                self.result_model.add_result(pair_index, base_file, compare_file, similarity, estimate)
+            self.showing_corpus = True
+            self.pair_offset = len(pairs)
+        self.imported_files = self.corpus.files()
+
+    def add_to_corpus(self):
+        with self.watch_paused():
+            files = self.choose_files()
+        if not files:
+            return
+        from CorpusWorker import CorpusWorker
+        self.open_corpus()
+        self.pair_offset = self.result_model.rowCount()
+        self.imported_files = list(dict.fromkeys(self.imported_files + files))
+        self.corpus.screen = self.candidate_screen()
+        worker = CorpusWorker(self.corpus, files, self)
+        worker.retracted.connect(self.result_model.remove_results)
+        self.start_worker(worker)
+
+    def toggle_watch(self):
+        if self.watcher is not None:
+            self.watch_timer.stop()
+            self.watcher = None
+            self.watch_button.setText('Watch Folder')
+            self.statusBar().showMessage('Stopped watching')
+            return
+        if self.worker is not None:
+            self.statusBar().showMessage('Wait for the current comparison to finish before watching a folder')
+            return
+        folder = QFileDialog.getExistingDirectory(self, "Watch Submissions Folder")
+        if not folder:
+            return
+        from engine.Watch import DirectoryWatcher
+        self.open_corpus()
+        self.watcher = DirectoryWatcher(self.corpus, [folder])
+        self.watch_button.setText('Stop Watching')
+        self.watch_timer.start(Constants.WATCH_INTERVAL * 1000)
+        self.poll_watched_folder()
+
+    def poll_watched_folder(self):
+        if self.worker is not None:
+            return  # the next tick polls again
+        from CorpusWorker import CorpusWorker
+        self.open_corpus()
+        self.pair_offset = self.result_model.rowCount()
+        self.corpus.screen = self.candidate_screen()
+        worker = CorpusWorker(self.corpus, [], self, self.watcher)
+        worker.retracted.connect(self.result_model.remove_results)
+        self.start_worker(worker, reset_statistics=False)  # reset by the worker once it finds changes
+
+    def remove_from_corpus(self):
+        if self.worker is not None:
+            return  # the corpus is being updated on the worker's thread
+        self.open_corpus()
+        with self.watch_paused():
+            dialog = ExportDialog(self.corpus.files(), self, 'Select Files to Remove from the Corpus')
+            if not dialog.exec_():
+                return
+            files = dialog.selected_files()
+            for file in files:
+                self.result_model.remove_results(self.corpus.remove(file))
+            self.imported_files = self.corpus.files()
+            self.statusBar().showMessage(f'Removed {len(files)} files from the corpus')
+
+    def cancel_comparison(self):
+        if self.worker is not None:
+            self.worker.requestInterruption()
+            self.worker.cancelled = True
+            self.cancel_button.setEnabled(False)
+            self.statusBar().showMessage('Cancelling...')
+
+    def show_indexing(self, done, total):
+        self.statusBar().showMessage(f'Indexing files: {done}/{total}')
+
+    def show_progress(self, done, total):
+        if done == 0:
+            self.compare_started = time.monotonic()
+            self.statusBar().showMessage(f'Comparing 0/{total} candidate pairs')
+            return
+        remaining = (time.monotonic() - self.compare_started) / done * (total - done)
+        self.statusBar().showMessage(f'Comparing {done}/{total} candidate pairs, '
+                                     f'about {int(remaining) // 60}m {int(remaining) % 60:02d}s left')
+
+    def comparison_finished(self):
+        cancelled = self.worker.cancelled
+        total = self.worker.total_pairs
+        error = self.worker.error
+        skipped = self.worker.skipped
+        screened_out = self.worker.screened_out
+        idle = getattr(self.worker, 'idle', False)
+        self.worker = None
+        self.import_button.setEnabled(True)
+        self.corpus_add_button.setEnabled(True)
+        self.corpus_remove_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        if idle:
+            self.statusBar().showMessage(f'Watching folder, last checked {time.strftime("%H:%M:%S")}')
+            return
+        self.run_seconds = time.monotonic() - self.run_started
+
+        from engine.HistoryStore import save_history
+        # Results arrive in the order chunks finish; history keeps them in pair order
+        duplicates = [result[1:] for result in sorted(self.run_results, key=lambda result: result[0])]
+        if duplicates:
+            save_history(self.username, duplicates)
+        if self.watcher is not None:
+            self.imported_files = self.corpus.files()
+        if error is not None:
+            message = f'Comparison failed after {len(duplicates)}/{total} candidate pairs: {error}'
+        elif self.watcher is not None and not total:
+            message = f'Watching folder, last checked {time.strftime("%H:%M:%S")}'
+        elif cancelled:
+            message = f'Comparison cancelled after {len(duplicates)}/{total} candidate pairs'
+        elif Profiling.enabled and Profiling.statistics.timers:
+            message = (f'Compared {len(duplicates)} candidate pairs in {self.run_seconds:.1f}s '
+                       f'({Profiling.statistics.summary()})')
+        else:
+            message = f'Compared {len(duplicates)} candidate pairs'
+        if screened_out:
+            message += f'; {screened_out} pairs screened out'
+        if skipped:
+            message += f'; skipped {len(skipped)} unreadable, e.g. {skipped[0]}'
+        self.statusBar().showMessage(message)
+
+    def filter_results(self, percent):
+        self.result_proxy.set_min_similarity(percent / 100)
+
+    def result_at(self, index):
+        return self.result_model.result(self.result_proxy.mapToSource(index).row())
+
+    def view_details(self, index):
+        with Profiling.stage('diff_view'):
+            self.open_details(index)
+
+    def open_details(self, index):
+        result = self.result_at(index)
+        content1 = read_submission(result.base_file)
+        content2 = read_submission(result.compare_file)
+        if result.blocks is not None:
+            similar_blocks, lines1, lines2 = result.blocks
         else:
-            self.statusBar().showMessage('Please select at least 2 files')
-
-    def compare_files(self, base_file, compare_files, duplicates):
-        content1 = read_file(base_file)
-        for compare_file in compare_files:
-            content2 = read_file(compare_file)
-            overall_similarity = calculate_overall_similarity(content1.splitlines(), content2.splitlines())
-            duplicates.append((base_file, compare_file, overall_similarity))
-        save_history(self.username, duplicates)
-
-    def display_results(self, duplicates):
-        self.result_list.clear()
-        self.suspicious_code_blocks.clear()  # Clear previous suspicious code blocks
-        for file1, file2, similarity in duplicates:
-            item = QListWidgetItem(f'{file1} and {file2} are {similarity * 100:.2f}% similar', self.result_list)
-            if similarity >= Constants.SUS_THRESHOLD:
-                item.setBackground(Qt.yellow)
-                self.suspicious_code_blocks.append((file1, file2, similarity))
-
-    def view_details(self, item):
-        files = item.text().split(' and ')
-        file1, file2 = files[0], files[1].split(' ')[0]
-        content1 = read_file(file1)
-        content2 = read_file(file2)
-        similar_blocks, lines1, lines2 = find_similar_blocks(content1, content2)
-        highlighted_content1, highlighted_content2 = highlight_code(content1, content2, similar_blocks, lines1, lines2)
-        self.show_diff(highlighted_content1, highlighted_content2)
-
-    def show_diff(self, highlighted_content1, highlighted_content2):
-        DiffWindow(self, highlighted_content1, highlighted_content2)
+            from engine.AnalysisCache import get_cache
+            similar_blocks, lines1, lines2 = get_cache().find_similar_blocks(content1, content2)
+        self.show_diff(content1, content2, similar_blocks, lines1, lines2)
+
+    def show_diff(self, content1, content2, similar_blocks, blocks1, blocks2):
+        DiffWindow(self, content1, content2, similar_blocks, blocks1, blocks2)
+
+    def show_run_statistics(self):
+        if not Profiling.statistics.timers:
+            self.statusBar().showMessage('No run statistics yet: check "Collect run statistics" and run a comparison')
+            return
+        from RunStatisticsDialog import RunStatisticsDialog
+        RunStatisticsDialog(Profiling.statistics, self.run_seconds, self).exec_()
 
     def show_history(self):
+        from HistoryWindow import HistoryWindow
         self.history_window = HistoryWindow(self.username)
         self.history_window.show()
 
@@ -118,14 +366,11 @@ class MainWindow(QMainWindow):
 
         # Open the file selection dialog
         dialog = ExportDialog(list(all_files), self)
-        # Preselect all files in red-background items
+        # Preselect all files of pairs marked as plagiarism
         preselect_files = set()
-        for i in range(self.result_list.count()):
-            item = self.result_list.item(i)
-            if item.background() == Qt.red:
-                text_parts = item.text().split(' ')
-                preselect_files.add(text_parts[0])
-                preselect_files.add(text_parts[2])
+        for base_file, compare_file in self.result_model.keys_with_status(MARKED):
+            preselect_files.add(base_file)
+            preselect_files.add(compare_file)
         dialog.preselect_files(preselect_files)
         if dialog.exec_():
             files_to_export = dialog.selected_files()
@@ -138,146 +383,49 @@ class MainWindow(QMainWindow):
             file_path, _ = QFileDialog.getSaveFileName(self, "Export Suspicious Code", "",
                                                        "Zip Files (*.zip);;All Files (*)", options=options)
             if file_path:
-                with zipfile.ZipFile(file_path, 'w') as zipf:
-                    for file in files_to_export:
-                        with open(file, 'r', encoding='utf-8') as f:
-                            file_content = f.read()
-                            zipf.writestr(f'{file.split("/")[-1]}', file_content)
-                self.statusBar().showMessage('Suspicious code exported successfully')
+                self.export_files(file_path, files_to_export)
+
+    def export_files(self, file_path, files):
+        from ExportWorker import ExportWorker
+        # The manifest lists the suspicious and marked pairs between exported files
+        exported = set(files)
+        results = []
+        for status in (MARKED, SUSPICIOUS):
+            for key in sorted(self.result_model.keys_with_status(status)):
+                if key[0] in exported and key[1] in exported:
+                    result = self.result_model.lookup(*key)
+                    results.append((result.base_file, result.compare_file, result.similarity, result.estimate,
+                                    result.status, result.blocks))
+
+        self.export_worker = ExportWorker(file_path, files, results, self)
+        self.export_worker.progress.connect(
+            lambda done, total: self.statusBar().showMessage(f'Exporting files: {done}/{total}'))
+        self.export_worker.finished.connect(self.export_finished)
+        self.export_button.setEnabled(False)
+        self.export_worker.start()
+
+    def export_finished(self):
+        if self.export_worker.error is not None:
+            self.statusBar().showMessage(f'Export failed: {self.export_worker.error}')
+        else:
+            self.statusBar().showMessage(f'Suspicious code exported successfully '
+                                         f'({self.export_worker.stored} distinct files)')
+        self.export_worker = None
+        self.export_button.setEnabled(True)
 
     def show_context_menu(self, position):
-        item = self.result_list.itemAt(position)
-        if item:
+        index = self.result_table.indexAt(position)
+        if index.isValid():
+            row = self.result_proxy.mapToSource(index).row()
             menu = QMenu()
-            # if item.background() == Qt.red:
             action = menu.addAction("Unmark as Plagiarism")
-            action.triggered.connect(lambda: self.unmark_as_plagiarism(item))
-            # else:
+            action.triggered.connect(lambda: self.unmark_as_plagiarism(row))
             action = menu.addAction("Mark as Plagiarism")
-            action.triggered.connect(lambda: self.mark_as_plagiarism(item))
-            menu.exec_(self.result_list.viewport().mapToGlobal(position))
-
-    def mark_as_plagiarism(self, item):
-        item.setBackground(Qt.red)
-
-    def unmark_as_plagiarism(self, item):
-        item.setBackground(Qt.white)
-
-def read_file(file_path):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        return file.read()
-
-def normalize_variable_names(node):
-    class VariableNameNormalizer(ast.NodeTransformer):
-        def __init__(self):
-            self.variable_map = {}
-            self.counter = 0
-
-        def get_new_name(self, original_name):
-            if original_name not in self.variable_map:
-                self.counter += 1
-                self.variable_map[original_name] = f"var{self.counter}"
-            return self.variable_map[original_name]
-
-        def visit_Name(self, node):
-            if isinstance(node.ctx, ast.Store) or isinstance(node.ctx, ast.Load):
-                new_name = self.get_new_name(node.id)
-                return ast.copy_location(ast.Name(id=new_name, ctx=node.ctx), node)
-            return node
-
-        def visit_arg(self, node):
-            new_name = self.get_new_name(node.arg)
-            return ast.copy_location(ast.arg(arg=new_name, annotation=node.annotation), node)
-
-    return VariableNameNormalizer().visit(node)
-
-def node_to_string(node):
-    return astor.to_source(node)
-
-def calculate_node_similarity(block1, block2):
-    return SequenceMatcher(None, block1, block2).ratio()
-
-def ast_similarity(node1, node2):
-    normalized_node1 = normalize_variable_names(node1)
-    normalized_node2 = normalize_variable_names(node2)
-    return calculate_node_similarity(node_to_string(normalized_node1), node_to_string(normalized_node2))
-
-def find_similar_blocks(content1, content2, threshold=0.9):
-    tree1 = ast.parse(content1)
-    tree2 = ast.parse(content2)
-
-    blocks1 = [node for node in ast.walk(tree1) if isinstance(node, ast.stmt)]
-    blocks2 = [node for node in ast.walk(tree2) if isinstance(node, ast.stmt)]
-
-    similar_blocks = []
-    used_blocks2 = set()
-
-    for i, line1 in enumerate(blocks1):
-        best_match = None
-        best_similarity = 0
-        for j, line2 in enumerate(blocks2):
-            if j in used_blocks2:
-                continue
-            similarity = ast_similarity(line1, line2)
-            if similarity >= threshold and similarity > best_similarity:
-                best_similarity = similarity
-                best_match = j
-        if best_match is not None:
-            similar_blocks.append((i, best_match, best_similarity))
-            used_blocks2.add(best_match)
-
-    return similar_blocks, blocks1, blocks2
-
-def highlight_code(content1, content2, similar_blocks, blocks1, blocks2):
-    lines1 = content1.splitlines()
-    lines2 = content2.splitlines()
-    highlighted_lines1 = lines1[:]
-    highlighted_lines2 = lines2[:]
-
-    for block1_idx, block2_idx, length in similar_blocks:
-        block1 = blocks1[block1_idx]
-        block2 = blocks2[block2_idx]
-
-        for i in range(block1.lineno - 1, block1.end_lineno):
-            if not lines1[i].strip().startswith("#"):
-                highlighted_lines1[i] = f'<span style="background-color: yellow">{lines1[i]}</span>'
-        for i in range(block2.lineno - 1, block2.end_lineno):
-            if not lines2[i].strip().startswith("#"):
-                highlighted_lines2[i] = f'<span style="background-color: yellow">{lines2[i]}</span>'
-
-    return '<br>'.join(highlighted_lines1), '<br>'.join(highlighted_lines2)
-
-def calculate_overall_similarity(lines1, lines2):
-    similarities = []
-
-    for line1 in lines1:
-        best_similarity = 0
-        for line2 in lines2:
-            similarity = calculate_node_similarity(line1, line2)
-            if similarity > best_similarity:
-                best_similarity = similarity
-        similarities.append(best_similarity)
-
-    return sum(similarities) / len(similarities)
-
-def save_history(username, duplicates: list):
-    history = {}
-    try:
-        with open('history.json', 'r') as file:
-            history = json.load(file)
-    except FileNotFoundError:
-        pass
-    
-    if username not in history:
-        history[username] = []
-
-    for duplicate in duplicates:
-        history[username].append({
-            'base_file': duplicate[0],
-            'compare_file': duplicate[1],
-            'timestamp': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), # unused
-            'similarity': duplicate[2],
-        })
-    
-    with open('history.json', 'w') as file:
-        json.dump(history, file)
\ No newline at end of file
+            action.triggered.connect(lambda: self.mark_as_plagiarism(row))
+            menu.exec_(self.result_table.viewport().mapToGlobal(position))
+
+    def mark_as_plagiarism(self, row):
+        self.result_model.set_status(row, MARKED)
+
+    def unmark_as_plagiarism(self, row):
+        self.result_model.set_status(row, UNMARKED)
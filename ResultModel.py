@@ -0,0 +1,143 @@
+import bisect
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, QVariant
+from PyQt5.QtGui import QColor
+
+import Constants
+
+NOT_SUSPICIOUS = ''
+SUSPICIOUS = 'Suspicious'
+MARKED = 'Plagiarism'
+UNMARKED = 'Cleared'
+
+STATUS_COLORS = {SUSPICIOUS: Qt.yellow, MARKED: Qt.red}
+
+
+class PairResult:
+    __slots__ = ('pair_index', 'base_file', 'compare_file', 'similarity', 'estimate', 'status', 'blocks')
+
+    def __init__(self, pair_index, base_file, compare_file, similarity, estimate, blocks=None):
+        self.pair_index = pair_index
+        self.base_file = base_file
+        self.compare_file = compare_file
+        self.similarity = similarity
+        self.estimate = estimate
+        self.blocks = blocks  # block matches computed during the run, see compact_matches
+        self.status = SUSPICIOUS if similarity >= Constants.SUS_THRESHOLD else NOT_SUSPICIOUS
+
+    @property
+    def key(self):
+        return self.base_file, self.compare_file
+
+
+class ResultModel(QAbstractTableModel):
+    """
+    Results of a comparison run, kept in pair order as they stream in. Results are
+    also indexed by (base_file, compare_file) and by status for constant-time lookups.
+    """
+    HEADERS = ('Base', 'Compare', 'Similarity', 'Estimated', 'Status')
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.results = []
+        self.pair_indices = []  # pair index of every row, sorted
+        self.by_key = {}  # (base_file, compare_file) -> PairResult
+        self.by_status = {SUSPICIOUS: set(), MARKED: set()}  # status -> keys
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.results)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return QVariant()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        result = self.results[index.row()]
+        values = (result.base_file, result.compare_file, result.similarity, result.estimate, result.status)
+        if role == Qt.DisplayRole:
+            if index.column() in (2, 3):
+                return f'{values[index.column()] * 100:.2f}%'
+            return values[index.column()]
+        if role == Qt.UserRole:  # raw value, used for sorting
+            return values[index.column()]
+        if role == Qt.BackgroundRole and result.status in STATUS_COLORS:
+            return QColor(STATUS_COLORS[result.status])
+        return QVariant()
+
+    def clear(self):
+        self.beginResetModel()
+        self.results = []
+        self.pair_indices = []
+        self.by_key = {}
+        self.by_status = {SUSPICIOUS: set(), MARKED: set()}
+        self.endResetModel()
+
+    def add_result(self, pair_index, base_file, compare_file, similarity, estimate, blocks=None):
+        result = PairResult(pair_index, base_file, compare_file, similarity, estimate, blocks)
+        row = bisect.bisect(self.pair_indices, pair_index)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.pair_indices.insert(row, pair_index)
+        self.results.insert(row, result)
+        self.by_key[result.key] = result
+        if result.status in self.by_status:
+            self.by_status[result.status].add(result.key)
+        self.endInsertRows()
+
+    def remove_results(self, keys):
+        """
+        Remove the results of the given (base_file, compare_file) keys, if present.
+        """
+        for key in keys:
+            result = self.by_key.pop(tuple(key), None)
+            if result is None:
+                continue
+            row = bisect.bisect_left(self.pair_indices, result.pair_index)
+            while self.results[row] is not result:  # results sharing a pair index
+                row += 1
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.results[row]
+            del self.pair_indices[row]
+            if result.status in self.by_status:
+                self.by_status[result.status].discard(result.key)
+            self.endRemoveRows()
+
+    def result(self, row):
+        return self.results[row]
+
+    def lookup(self, base_file, compare_file):
+        return self.by_key.get((base_file, compare_file))
+
+    def set_status(self, row, status):
+        result = self.results[row]
+        if result.status in self.by_status:
+            self.by_status[result.status].discard(result.key)
+        result.status = status
+        if status in self.by_status:
+            self.by_status[status].add(result.key)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+
+    def keys_with_status(self, status):
+        return self.by_status[status]
+
+
+class ResultFilterProxy(QSortFilterProxyModel):
+    """
+    Sorts results by their raw values and hides the pairs below a similarity threshold.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.min_similarity = 0.0
+        self.setSortRole(Qt.UserRole)
+
+    def set_min_similarity(self, min_similarity):
+        self.min_similarity = min_similarity
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return self.sourceModel().result(source_row).similarity >= self.min_similarity
@@ -0,0 +1,51 @@
+import json
+
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QDialogButtonBox, \
+    QFileDialog, QHeaderView
+
+
+class RunStatisticsDialog(QDialog):
+    """
+    Shows where the last run spent its time, stage by stage, and what it counted.
+    Stage times are inclusive and summed over worker processes.
+    """
+    def __init__(self, statistics, seconds, parent=None):
+        super().__init__(parent)
+        self.statistics = statistics
+        self.seconds = seconds
+        self.setWindowTitle('Run Statistics')
+        self.resize(520, 480)
+        layout = QVBoxLayout(self)
+
+        layout.addWidget(QLabel(f'Run took {seconds:.2f}s. Stage times include nested stages and are '
+                                f'summed over worker processes.', self))
+        rows = statistics.rows()
+        stages = QTableWidget(len(rows), 4, self)
+        stages.setHorizontalHeaderLabels(('Stage', 'Calls', 'Seconds', 'Per call'))
+        for row, (name, calls, stage_seconds) in enumerate(rows):
+            for column, value in enumerate((name, str(calls), f'{stage_seconds:.3f}',
+                                            f'{stage_seconds / calls * 1000:.2f} ms')):
+                stages.setItem(row, column, QTableWidgetItem(value))
+        stages.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(stages)
+
+        counters = sorted(statistics.to_record()['counters'].items())
+        counter_table = QTableWidget(len(counters), 2, self)
+        counter_table.setHorizontalHeaderLabels(('Counter', 'Total'))
+        for row, (name, total) in enumerate(counters):
+            counter_table.setItem(row, 0, QTableWidgetItem(name))
+            counter_table.setItem(row, 1, QTableWidgetItem(str(total)))
+        counter_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(counter_table)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Save | QDialogButtonBox.Close, self)
+        buttons.accepted.connect(self.save)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def save(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Run Statistics", "run_statistics.json",
+                                                   "JSON Files (*.json);;All Files (*)")
+        if file_path:
+            with open(file_path, 'w', encoding='utf-8') as output:
+                json.dump({'seconds': self.seconds, **self.statistics.to_record()}, output, indent=1)
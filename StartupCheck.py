@@ -0,0 +1,54 @@
+"""
+Checks that the login screen starts quickly: imports it in a fresh interpreter with
+-X importtime, fails if the import takes longer than Constants.STARTUP_BUDGET_MS or
+pulls in modules that should only load after login.
+
+    python StartupCheck.py
+"""
+import os
+import subprocess
+import sys
+
+import Constants
+
+ENTRY_MODULE = 'LoginWindow'
+LAZY_MODULES = ('MainWindow', 'astor', 'engine.AST', 'engine.ParallelCompare', 'concurrent.futures.process')
+RUNS = 3
+
+def measure_import(module):
+    """
+    Return the cumulative import time of module in microseconds and every module it imported.
+    """
+    environment = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                             capture_output=True, text=True, env=environment,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr)
+    total = None
+    imported = set()
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imported.add(name.strip())
+        if name.strip() == module:
+            total = int(cumulative)
+    return total, imported
+
+def main():
+    timings = []
+    for _ in range(RUNS):
+        total, imported = measure_import(ENTRY_MODULE)
+        timings.append(total)
+    best_ms = min(timings) / 1000
+    eager = [module for module in LAZY_MODULES if module in imported]
+
+    print(f'import {ENTRY_MODULE}: {best_ms:.1f} ms (budget {Constants.STARTUP_BUDGET_MS} ms)')
+    if eager:
+        print(f'Imported before login: {", ".join(eager)}')
+    if best_ms > Constants.STARTUP_BUDGET_MS or eager:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,447 @@
+import ast
+import sys
+from array import array
+from collections import namedtuple
+from difflib import SequenceMatcher
+
+import Constants
+from engine import Profiling
+from engine.Profiling import count, stage, timed
+from engine.StructuralHash import statement_hashes
+
+@timed('read')
+def read_file(file_path):
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return file.read()
+
+def normalize_variable_names(node):
+    """
+    Normalize variable names in the AST to generic names like var1, var2, etc.
+    """
+    class VariableNameNormalizer(ast.NodeTransformer):
+        def __init__(self):
+            self.variable_map = {}
+            self.counter = 0
+
+        def get_new_name(self, original_name):
+            if original_name not in self.variable_map:
+                self.counter += 1
+                self.variable_map[original_name] = f"var{self.counter}"
+            return self.variable_map[original_name]
+
+        def visit_Name(self, node):
+            if isinstance(node.ctx, ast.Store) or isinstance(node.ctx, ast.Load):
+                new_name = self.get_new_name(node.id)
+                return ast.copy_location(ast.Name(id=new_name, ctx=node.ctx), node)
+            return node
+
+        def visit_arg(self, node):
+            new_name = self.get_new_name(node.arg)
+            return ast.copy_location(ast.arg(arg=new_name, annotation=node.annotation), node)
+
+    return VariableNameNormalizer().visit(node)
+
+def node_to_string(node):
+    import astor  # only needed once statements are normalized, keeps importing the engine cheap
+    return astor.to_source(node)
+
+def calculate_node_similarity(block1, block2):
+    return SequenceMatcher(None, block1, block2).ratio()
+
+ENGINE_VERSION = 1  # bump whenever prepared documents or block matches change
+
+# Line span of a statement, all highlight_code needs from it
+Block = namedtuple('Block', ['lineno', 'end_lineno'])
+
+class SpanTable:
+    """
+    (lineno, end_lineno) of statements in two arrays, indexed like a list of Blocks.
+    """
+    __slots__ = ('starts', 'ends')
+
+    def __init__(self, spans=()):
+        self.starts = array('i')
+        self.ends = array('i')
+        for start, end in spans:
+            self.starts.append(start)
+            self.ends.append(end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        return Block(self.starts[index], self.ends[index])
+
+    def __iter__(self):
+        return map(Block._make, zip(self.starts, self.ends))
+
+def statement_kind(node):
+    name = type(node).__name__
+    return Constants.STATEMENT_KINDS.get(name, name)
+
+# Statement kinds are stored as codes into this list of every kind there is
+KIND_NAMES = sorted({Constants.STATEMENT_KINDS.get(cls.__name__, cls.__name__) for cls in ast.stmt.__subclasses__()})
+KIND_CODES = {kind: code for code, kind in enumerate(KIND_NAMES)}
+
+def extract_statements(content):
+    """
+    Parse content and return the (spans, hashes, parents, kinds, sources) of its
+    statements, in ast.walk order. The tree is dropped on return.
+    """
+    with stage('parse'):
+        tree = ast.parse(content)
+    statements = [node for node in ast.walk(tree) if isinstance(node, ast.stmt)]
+    spans = [(node.lineno, node.end_lineno) for node in statements]
+    with stage('structural_hash'):
+        hashes = statement_hashes(tree, statements)
+    parents = statement_parents(tree, statements)
+    kinds = [statement_kind(node) for node in statements]
+    # normalize_variable_names rewrites names in place; ast.walk yields parents
+    # before their children, so every statement is renamed from a consistent
+    # tree exactly once.
+    sources = []
+    for node in statements:
+        with stage('normalize'):
+            normalized = normalize_variable_names(node)
+        with stage('unparse'):
+            sources.append(node_to_string(normalized))
+    count('statements', len(statements))
+    return spans, hashes, parents, kinds, sources
+
+class PreparedDocument:
+    """
+    Statements of one file, normalized and unparsed once so that matching only
+    has to compare strings. Statements are rows of a table of parallel arrays
+    (line spans, structural hashes, parents, kind codes, source lengths) plus
+    their normalized sources, interned so that repeated statements share one
+    string; no syntax tree outlives the constructor.
+    """
+    __slots__ = ('blocks', 'hashes', 'parents', 'kinds', 'sources', 'lengths', 'child_starts', 'child_indices')
+    FIELDS = ('spans', 'hashes', 'parents', 'kinds', 'sources')
+
+    def __init__(self, content):
+        self.fill(*extract_statements(content))
+
+    def fill(self, spans, hashes, parents, kinds, sources):
+        self.blocks = SpanTable(spans)
+        self.hashes = array('Q', hashes)
+        self.parents = array('i', parents)
+        self.kinds = array('B', (KIND_CODES[kind] for kind in kinds))
+        self.sources = [sys.intern(source) for source in sources]
+        self.lengths = array('I', map(len, self.sources))
+        self.child_starts, self.child_indices = child_table(self.parents)
+
+    def to_record(self):
+        return {'spans': [list(block) for block in self.blocks], 'hashes': self.hashes.tolist(),
+                'parents': self.parents.tolist(), 'kinds': [KIND_NAMES[code] for code in self.kinds],
+                'sources': self.sources}
+
+    @classmethod
+    def from_record(cls, record):
+        document = cls.__new__(cls)
+        document.fill(*(record[field] for field in cls.FIELDS))
+        return document
+
+    def __len__(self):
+        return len(self.sources)
+
+    def children(self, index):
+        return self.child_indices[self.child_starts[index]:self.child_starts[index + 1]]
+
+    def descendants(self, index):
+        found = []
+        stack = list(self.children(index))
+        while stack:
+            child = stack.pop()
+            found.append(child)
+            stack.extend(self.children(child))
+        return found
+
+    def ancestors(self, index):
+        found = []
+        parent = self.parents[index]
+        while parent >= 0:
+            found.append(parent)
+            parent = self.parents[parent]
+        return found
+
+    def hash_table(self):
+        """
+        Map every structural hash to the indices of its statements, in order.
+        """
+        return group_indices(self.hashes)
+
+    def kind_table(self):
+        """
+        Map every statement kind code to the indices of its statements, in order.
+        """
+        return group_indices(self.kinds)
+
+def group_indices(keys):
+    table = {}
+    for index, key in enumerate(keys):
+        table.setdefault(key, []).append(index)
+    return table
+
+def child_table(parents):
+    """
+    Return (starts, indices): the children of statement i are indices[starts[i]:starts[i + 1]],
+    in statement order.
+    """
+    starts = array('i', [0]) * (len(parents) + 1)
+    for parent in parents:
+        if parent >= 0:
+            starts[parent + 1] += 1
+    for index in range(len(parents)):
+        starts[index + 1] += starts[index]
+    indices = array('i', [0]) * starts[-1]
+    filled = starts[:-1]
+    for index, parent in enumerate(parents):
+        if parent >= 0:
+            indices[filled[parent]] = index
+            filled[parent] += 1
+    return starts, indices
+
+def statement_parents(tree, statements):
+    """
+    Return the index of the enclosing statement of every statement, or -1 at module level.
+    """
+    index_of = {id(node): index for index, node in enumerate(statements)}
+    parents = [-1] * len(statements)
+    stack = [(tree, -1)]
+    while stack:
+        node, parent = stack.pop()
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.stmt):
+                parents[index_of[id(child)]] = parent
+                stack.append((child, index_of[id(child)]))
+            else:
+                stack.append((child, parent))
+    return parents
+
+def prepare_document(content):
+    if isinstance(content, PreparedDocument):
+        return content
+    return PreparedDocument(content)
+
+class MatchStatistics:
+    """
+    Counts how many statement pairs each stage of bounded_similarity settled.
+    """
+    def __init__(self):
+        self.covered = 0
+        self.hash_hits = 0
+        self.kind_pairs = {}  # statement kind -> pairs compared within it
+        self.pairs = 0
+        self.length_pruned = 0
+        self.quick_ratio_pruned = 0
+        self.full_ratios = 0
+
+    def __str__(self):
+        kinds = ', '.join(f'{kind} {count}' for kind, count in sorted(self.kind_pairs.items()))
+        return (f'{self.covered} statements covered by a matched parent, {self.hash_hits} clones found by hash, '
+                f'{self.pairs} pairs: {self.length_pruned} pruned by length, '
+                f'{self.quick_ratio_pruned} by quick_ratio, {self.full_ratios} full ratios (per kind: {kinds})')
+
+def bounded_similarity(block1, block2, length1, length2, threshold, best_similarity, stats=None):
+    """
+    Return the similarity of two blocks, or None as soon as an upper bound shows it
+    cannot reach threshold and beat best_similarity.
+    """
+    def hopeless(bound):
+        return bound < threshold or bound <= best_similarity
+
+    if stats is not None:
+        stats.pairs += 1
+    # 2 * min / total is what real_quick_ratio returns, computed without a matcher
+    total = length1 + length2
+    if total and hopeless(2.0 * min(length1, length2) / total):
+        if stats is not None:
+            stats.length_pruned += 1
+        return None
+    matcher = SequenceMatcher(None, block1, block2)
+    if hopeless(matcher.quick_ratio()):
+        if stats is not None:
+            stats.quick_ratio_pruned += 1
+        return None
+    if stats is not None:
+        stats.full_ratios += 1
+    return matcher.ratio()
+
+def find_similar_blocks(content1, content2, threshold=0.9, stats=None, hierarchical=Constants.HIERARCHICAL_MATCHING,
+                        blocking=Constants.NODE_TYPE_BLOCKING):
+    """
+    Greedily match every statement of content1 to its most similar unused statement of
+    content2. In hierarchical mode a matched statement covers its nested statements:
+    they are not compared again, and only unmatched parents are descended into.
+    With blocking, statements are only compared to statements of the same kind.
+    """
+    doc1 = prepare_document(content1)
+    doc2 = prepare_document(content2)
+    profiled = stats is None and Profiling.enabled
+    if profiled:
+        stats = MatchStatistics()
+    similar_blocks = match_documents(doc1, doc2, threshold, stats, hierarchical, blocking)
+    if profiled:
+        count('statement_pairs', stats.pairs)
+        count('full_ratios', stats.full_ratios)
+        count('hash_hits', stats.hash_hits)
+    return similar_blocks, doc1.blocks, doc2.blocks
+
+@timed('match_blocks')
+def match_documents(doc1, doc2, threshold, stats, hierarchical, blocking):
+    """
+    The matching loop of find_similar_blocks: return its (i, j, similarity) triples.
+    """
+    similar_blocks = []
+    used_blocks2 = set()
+    covered_blocks1 = set()
+    hash_table2 = doc2.hash_table()
+    kind_table2 = doc2.kind_table() if blocking else None
+
+    def matched(i, j, similarity):
+        similar_blocks.append((i, j, similarity))
+        used_blocks2.add(j)
+        if hierarchical:
+            descendants = doc1.descendants(i)
+            covered_blocks1.update(descendants)
+            used_blocks2.update(doc2.descendants(j))
+            used_blocks2.update(doc2.ancestors(j))
+            if stats is not None:
+                stats.covered += len(descendants)
+
+    # ast.walk order is breadth-first, so parents are always tried before their children
+    for i, source1 in enumerate(doc1.sources):
+        if i in covered_blocks1:
+            continue
+        # An identical normalized source is a perfect match, and the first unused one
+        # is exactly what the fuzzy search below would pick
+        clone = next((j for j in hash_table2.get(doc1.hashes[i], ())
+                      if j not in used_blocks2 and doc2.sources[j] == source1), None)
+        if clone is not None:
+            if stats is not None:
+                stats.hash_hits += 1
+            matched(i, clone, 1.0)
+            continue
+
+        best_match = None
+        best_similarity = 0
+        kind = doc1.kinds[i]
+        candidates = kind_table2.get(kind, ()) if blocking else range(len(doc2))
+        for j in candidates:
+            if j in used_blocks2:
+                continue
+            if stats is not None:
+                name = KIND_NAMES[kind]
+                stats.kind_pairs[name] = stats.kind_pairs.get(name, 0) + 1
+            similarity = bounded_similarity(source1, doc2.sources[j], doc1.lengths[i], doc2.lengths[j],
+                                            threshold, best_similarity, stats)
+            if similarity is not None and similarity >= threshold and similarity > best_similarity:
+                best_similarity = similarity
+                best_match = j
+        if best_match is not None:
+            matched(i, best_match, best_similarity)
+
+    return similar_blocks
+
+def compact_matches(similar_blocks, blocks1, blocks2):
+    """
+    Keep only the blocks that take part in a match, so the result of find_similar_blocks
+    can be stored cheaply. The returned triples index the shortened block tables.
+    """
+    return ([(k, k, similarity) for k, (_, _, similarity) in enumerate(similar_blocks)],
+            SpanTable(blocks1[i] for i, _, _ in similar_blocks),
+            SpanTable(blocks2[j] for _, j, _ in similar_blocks))
+
+def merge_spans(spans):
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def highlight_ranges(content, spans):
+    """
+    Merge the (lineno, end_lineno) spans of matched blocks into disjoint, sorted
+    (first, last) line ranges, leaving out comment lines like highlight_code does.
+    """
+    lines = content.splitlines()
+    ranges = []
+    for start, end in merge_spans(spans):
+        first = None
+        for number in range(start, end + 1):
+            if lines[number - 1].strip().startswith("#"):
+                if first is not None:
+                    ranges.append((first, number - 1))
+                    first = None
+            elif first is None:
+                first = number
+        if first is not None:
+            ranges.append((first, end))
+    return ranges
+
+def highlight_code(content1, content2, similar_blocks, blocks1, blocks2):
+    lines1 = content1.splitlines()
+    lines2 = content2.splitlines()
+    highlighted_lines1 = lines1[:]
+    highlighted_lines2 = lines2[:]
+
+    for block1_idx, block2_idx, _ in similar_blocks:
+        block1 = blocks1[block1_idx]
+        block2 = blocks2[block2_idx]
+
+        for i in range(block1.lineno - 1, block1.end_lineno):
+            if not lines1[i].strip().startswith("#"):
+                highlighted_lines1[i] = f"\033[93m{lines1[i]}\033[0m"  # Yellow color
+
+        for i in range(block2.lineno - 1, block2.end_lineno):
+            if not lines2[i].strip().startswith("#"):
+                highlighted_lines2[i] = f"\033[93m{lines2[i]}\033[0m"  # Yellow color
+
+    return '\n'.join(highlighted_lines1), '\n'.join(highlighted_lines2)
+
+@timed('overall_similarity')
+def calculate_overall_similarity(blocks1, blocks2):
+    similarities = []
+
+    for block1 in blocks1:
+        best_similarity = 0
+        for block2 in blocks2:
+            similarity = calculate_node_similarity(block1, block2)
+            if similarity > best_similarity:
+                best_similarity = similarity
+        similarities.append(best_similarity)
+
+    if not similarities:
+        return 0.0
+    return sum(similarities) / len(similarities)
+
+def main(file1, file2, threshold=0.9):
+    content1 = read_file(file1)
+    content2 = read_file(file2)
+    doc1 = prepare_document(content1)
+    doc2 = prepare_document(content2)
+
+    stats = MatchStatistics()
+    similar_blocks, blocks1, blocks2 = find_similar_blocks(doc1, doc2, threshold, stats)
+    print(f"Block matching: {stats}")
+
+    overall_similarity = calculate_overall_similarity(doc1.sources, doc2.sources)
+    print(f"The overall similarity between the two files is: {overall_similarity:.2%}\n")
+
+    highlighted_content1, highlighted_content2 = highlight_code(content1, content2, similar_blocks, blocks1, blocks2)
+
+    print("File 1 with highlighted similar blocks:")
+    print(highlighted_content1)
+    print("\nFile 2 with highlighted similar blocks:")
+    print(highlighted_content2)
+
+if __name__ == "__main__":
+    # python -m engine.AST base.py other.py [more.py ...] compares base.py with every other file
+    if len(sys.argv) < 3:
+        sys.exit("usage: python -m engine.AST base.py other.py [more.py ...]")
+    for other in sys.argv[2:]:
+        print(f"Comparing {sys.argv[1]} and {other}:")
+        main(sys.argv[1], other)
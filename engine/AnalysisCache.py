@@ -0,0 +1,133 @@
+import atexit
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+import Constants
+from engine.AST import ENGINE_VERSION, PreparedDocument, find_similar_blocks
+from engine.Fingerprint import fingerprint
+from engine.Profiling import timed
+
+TOUCH_BATCH = 256  # cache hits whose last_used times are written in one transaction
+
+def content_hash(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+class AnalysisCache:
+    """
+    SQLite store of prepared documents, fingerprints and block matches, keyed by the
+    SHA-256 of the file contents and the engine version, with LRU eviction by size.
+    Hits only read: their last_used times are kept in memory and written in batches.
+    """
+    def __init__(self, path=Constants.CACHE_PATH, max_bytes=Constants.CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS records ('
+                                    'key TEXT PRIMARY KEY, data BLOB NOT NULL, '
+                                    'size INTEGER NOT NULL, last_used REAL NOT NULL)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS records_last_used ON records (last_used)')
+        self.touched = {}  # key -> last_used not yet written
+        # Running size of all records; recounted before evicting, in case another process wrote too
+        self.total_bytes = self.count_bytes()
+
+    def count_bytes(self):
+        return self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM records').fetchone()[0]
+
+    @timed('cache_lookup')
+    def get(self, key):
+        with self.lock:
+            row = self.connection.execute('SELECT data FROM records WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self.touched[key] = time.time()
+            if len(self.touched) >= TOUCH_BATCH:
+                with self.connection:
+                    self.write_touches()
+        return json.loads(zlib.decompress(row[0]))
+
+    def write_touches(self):
+        self.connection.executemany('UPDATE records SET last_used = ? WHERE key = ?',
+                                    [(last_used, key) for key, last_used in self.touched.items()])
+        self.touched.clear()
+
+    def flush(self):
+        with self.lock, self.connection:
+            self.write_touches()
+
+    def put(self, key, value):
+        data = zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+        with self.lock, self.connection:
+            row = self.connection.execute('SELECT size FROM records WHERE key = ?', (key,)).fetchone()
+            self.connection.execute('INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)',
+                                    (key, data, len(data), time.time()))
+            self.touched.pop(key, None)
+            self.total_bytes += len(data) - (row[0] if row else 0)
+            if self.total_bytes > self.max_bytes:
+                self.evict(keep=key)
+
+    def evict(self, keep=None):
+        self.write_touches()  # so the least recently used records are picked by their real last use
+        self.total_bytes = self.count_bytes()
+        if self.total_bytes <= self.max_bytes:
+            return
+        # Drop the least recently used records until the cache is back under 90% of its budget
+        for key, size in self.connection.execute('SELECT key, size FROM records WHERE key != ? ORDER BY last_used',
+                                                 (keep,)).fetchall():
+            self.connection.execute('DELETE FROM records WHERE key = ?', (key,))
+            self.total_bytes -= size
+            if self.total_bytes <= self.max_bytes * 0.9:
+                break
+
+    def document(self, content):
+        key = f'document:{ENGINE_VERSION}:{content_hash(content)}'
+        record = self.get(key)
+        if record is not None:
+            return PreparedDocument.from_record(record)
+        document = PreparedDocument(content)
+        self.put(key, document.to_record())
+        return document
+
+    def fingerprints(self, content, k=Constants.WINNOW_K, window=Constants.WINNOW_WINDOW):
+        key = f'fingerprints:{ENGINE_VERSION}:{k}:{window}:{content_hash(content)}'
+        record = self.get(key)
+        if record is not None:
+            return set(record)
+        fingerprints = fingerprint(content, k, window)
+        self.put(key, sorted(fingerprints))
+        return fingerprints
+
+    def find_similar_blocks(self, content1, content2, threshold=0.9, hierarchical=Constants.HIERARCHICAL_MATCHING,
+                            blocking=Constants.NODE_TYPE_BLOCKING):
+        """
+        Cached find_similar_blocks, returning the same (similar_blocks, blocks1, blocks2).
+        """
+        key = (f'blocks:{ENGINE_VERSION}:{threshold}:{int(hierarchical)}:{int(blocking)}:'
+               f'{content_hash(content1)}:{content_hash(content2)}')
+        doc1 = self.document(content1)
+        doc2 = self.document(content2)
+        record = self.get(key)
+        if record is not None:
+            return [tuple(match) for match in record], doc1.blocks, doc2.blocks
+        similar_blocks, blocks1, blocks2 = find_similar_blocks(doc1, doc2, threshold, hierarchical=hierarchical,
+                                                               blocking=blocking)
+        self.put(key, similar_blocks)
+        return similar_blocks, blocks1, blocks2
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.flush)
+        self.connection.close()
+
+shared_cache = None
+
+def get_cache():
+    global shared_cache
+    if shared_cache is None:
+        shared_cache = AnalysisCache()
+        atexit.register(shared_cache.flush)  # last_used times of the last hits
+    return shared_cache
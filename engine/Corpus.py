@@ -0,0 +1,187 @@
+import json
+import sqlite3
+import threading
+import zlib
+
+import Constants
+from engine.Fingerprint import FingerprintIndex
+from engine.MinHash import MinHashLSH
+from engine.ParallelCompare import iter_compare_pairs
+from engine.Submissions import READ_ERRORS, read_submission, submission_hash
+
+def pack(value):
+    return zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+
+def unpack(data):
+    return json.loads(zlib.decompress(data))
+
+class CorpusSession:
+    """
+    A corpus of submissions compared all against all, kept in SQLite between runs:
+    every file's content hash, (size, mtime) when indexed, fingerprints and MinHash
+    signature, the score of every compared pair and the pairs still waiting for one. Adding, replacing or removing a file only screens and
+    compares that file against the index, so a late submission costs one candidate
+    lookup per indexed file instead of a new all-pairs run.
+    """
+    def __init__(self, path=Constants.CORPUS_PATH, screen=Constants.CANDIDATE_SCREEN):
+        self.screen = screen
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS files ('
+                                    'name TEXT PRIMARY KEY, hash TEXT NOT NULL, size INTEGER, mtime INTEGER, '
+                                    'fingerprints BLOB NOT NULL, signature BLOB)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS pairs ('
+                                    'base_file TEXT NOT NULL, compare_file TEXT NOT NULL, '
+                                    'similarity REAL NOT NULL, estimate REAL NOT NULL, '
+                                    'PRIMARY KEY (base_file, compare_file))')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS pairs_compare_file ON pairs (compare_file)')
+            # Pairs returned by update that have no score yet, e.g. after a cancelled run
+            self.connection.execute('CREATE TABLE IF NOT EXISTS pending ('
+                                    'base_file TEXT NOT NULL, compare_file TEXT NOT NULL, '
+                                    'PRIMARY KEY (base_file, compare_file))')
+
+        self.screened_out = 0  # pairs the candidate screen has left out since the session was opened
+        self.hashes = {}  # file -> content hash
+        self.stats = {}  # file -> (size, mtime in ns) when it was indexed, for files on disk
+        self.fingerprints = FingerprintIndex()
+        self.signatures = MinHashLSH()
+        for name, digest, size, mtime, fingerprints, signature in self.connection.execute(
+                'SELECT name, hash, size, mtime, fingerprints, signature FROM files'):
+            self.hashes[name] = digest
+            if size is not None:
+                self.stats[name] = (size, mtime)
+            self.fingerprints.add(name, None, set(unpack(fingerprints)))
+            self.signatures.add(name, None, tuple(unpack(signature)) if signature is not None else None)
+
+    def files(self):
+        return sorted(self.hashes)
+
+    def pairs(self):
+        """
+        Return every stored (base_file, compare_file, similarity, estimate), most similar first.
+        """
+        with self.lock:
+            return self.connection.execute('SELECT base_file, compare_file, similarity, estimate FROM pairs '
+                                           'ORDER BY similarity DESC, base_file, compare_file').fetchall()
+
+    def index(self, name, content, digest, stat=None):
+        self.hashes[name] = digest
+        self.fingerprints.add(name, content)
+        self.signatures.add(name, content)
+        signature = self.signatures.signatures[name]
+        self.stats.pop(name, None)
+        if stat is not None:
+            self.stats[name] = stat
+        size, mtime = stat or (None, None)
+        with self.lock, self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)',
+                                    (name, digest, size, mtime, pack(sorted(self.fingerprints.fingerprints[name])),
+                                     pack(signature) if signature is not None else None))
+
+    def touch(self, name, stat):
+        # Same contents under a new (size, mtime), e.g. a file saved again unchanged
+        self.stats[name] = stat
+        with self.lock, self.connection:
+            self.connection.execute('UPDATE files SET size = ?, mtime = ? WHERE name = ?', (*stat, name))
+
+    def retract(self, name):
+        """
+        Delete the stored and pending pairs of a file and return the (base_file, compare_file)
+        keys of the stored ones.
+        """
+        with self.lock, self.connection:
+            keys = self.connection.execute('SELECT base_file, compare_file FROM pairs '
+                                           'WHERE base_file = ? OR compare_file = ?', (name, name)).fetchall()
+            self.connection.execute('DELETE FROM pairs WHERE base_file = ? OR compare_file = ?', (name, name))
+            self.connection.execute('DELETE FROM pending WHERE base_file = ? OR compare_file = ?', (name, name))
+        return keys
+
+    def update(self, names, progress=None, stats=None, skipped=None):
+        """
+        Index the new and changed files among names and return (pairs, retracted): the
+        pairs of a changed file and an indexed file that pass the candidate screen,
+        and the keys of the pairs dropped because a file's contents changed. Files
+        whose contents are unchanged are skipped. Pairs returned before but never
+        scored, e.g. by a cancelled compare, are returned again. stats maps files to the (size, mtime)
+        to record with them. progress(done, total) is called after each file is read.
+        A file that cannot be read is reported through skipped(name, error) and left
+        as it was, or raises when skipped is None.
+        """
+        stats = stats or {}
+        changed = []
+        retracted = []
+        for done, name in enumerate(dict.fromkeys(names), 1):
+            try:
+                content = read_submission(name)
+                digest = submission_hash(name)
+            except READ_ERRORS as error:
+                if skipped is None:
+                    raise
+                skipped(name, error)
+                continue
+            if self.hashes.get(name) != digest:
+                if name in self.hashes:
+                    retracted.extend(self.retract(name))
+                self.index(name, content, digest, stats.get(name))
+                changed.append(name)
+            elif name in stats and self.stats.get(name) != stats[name]:
+                self.touch(name, stats[name])
+            if progress is not None:
+                progress(done, len(names))
+
+        # Pairs are ordered by name like an all-pairs run, which keeps the scores of
+        # the asymmetric line similarity independent of the order files arrive in
+        indexed = self.files()
+        considered = set()
+        pairs = {}
+        for name in changed:
+            others = [other for other in indexed if other != name]
+            considered.update((min(name, other), max(name, other)) for other in others)
+            if self.screen == 'winnowing':
+                others = self.fingerprints.candidates(name, others)
+            elif self.screen == 'minhash':
+                others = self.signatures.candidates(name, others)
+            pairs.update(dict.fromkeys((min(name, other), max(name, other)) for other in others))
+        self.screened_out += len(considered) - len(pairs)
+        with self.lock, self.connection:
+            self.connection.executemany('INSERT OR IGNORE INTO pending VALUES (?, ?)', pairs)
+            pending = self.connection.execute('SELECT base_file, compare_file FROM pending '
+                                              'ORDER BY base_file, compare_file').fetchall()
+        return list(dict.fromkeys([*pairs, *map(tuple, pending)])), retracted
+
+    def compare(self, pairs, workers=Constants.COMPARE_WORKERS, precompute_blocks=False, skipped=None):
+        """
+        Compare pairs returned by update, storing each score as it arrives, and yield
+        (index, base_file, compare_file, similarity, estimate, blocks) like iter_compare_pairs.
+        """
+        results = iter_compare_pairs(pairs, workers, precompute_blocks=precompute_blocks, skipped=skipped)
+        try:
+            for index, base_file, compare_file, similarity, blocks in results:
+                estimate = self.signatures.estimate(base_file, compare_file)
+                with self.lock, self.connection:
+                    self.connection.execute('INSERT OR REPLACE INTO pairs VALUES (?, ?, ?, ?)',
+                                            (base_file, compare_file, similarity, estimate))
+                    self.connection.execute('DELETE FROM pending WHERE base_file = ? AND compare_file = ?',
+                                            (base_file, compare_file))
+                yield index, base_file, compare_file, similarity, estimate, blocks
+        finally:
+            results.close()
+
+    def remove(self, name):
+        """
+        Drop a file from the corpus and return the keys of its retracted pairs.
+        """
+        if name not in self.hashes:
+            return []
+        keys = self.retract(name)
+        del self.hashes[name]
+        self.stats.pop(name, None)
+        self.fingerprints.remove(name)
+        self.signatures.remove(name)
+        with self.lock, self.connection:
+            self.connection.execute('DELETE FROM files WHERE name = ?', (name,))
+        return keys
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import zipfile
+
+import Constants
+from engine.AST import merge_spans
+from engine.AnalysisCache import get_cache
+from engine.Submissions import READ_CHUNK, hash_submission, open_submission, read_submission, split_name, \
+    submission_size
+
+COMPRESSION = {'deflate': zipfile.ZIP_DEFLATED, 'lzma': zipfile.ZIP_LZMA, 'store': zipfile.ZIP_STORED}
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+def stored_path(name, digest):
+    """
+    Path of a submission's contents inside an export: one folder per distinct content,
+    keeping the original file name.
+    """
+    archive_path, member, _ = split_name(name)
+    return f'files/{digest[:16]}/{os.path.basename(member or archive_path)}'
+
+def matched_lines(base_file, compare_file, blocks=None):
+    """
+    Return the merged (first, last) line ranges of both files covered by matched blocks,
+    computing the matches through the analysis cache when blocks is None.
+    """
+    if blocks is None:
+        blocks = get_cache().find_similar_blocks(read_submission(base_file), read_submission(compare_file))
+    similar_blocks, blocks1, blocks2 = blocks
+    return (merge_spans(blocks1[i] for i, _, _ in similar_blocks),
+            merge_spans(blocks2[j] for _, j, _ in similar_blocks))
+
+def pair_record(base_file, compare_file, similarity, estimate, status, blocks=None):
+    base_lines, compare_lines = matched_lines(base_file, compare_file, blocks)
+    return {'base_file': base_file, 'compare_file': compare_file, 'similarity': similarity,
+            'estimate': estimate, 'status': status, 'base_lines': base_lines, 'compare_lines': compare_lines}
+
+def copy_hashed(source, target):
+    """
+    Copy a stream in chunks and return the SHA-256 of the bytes copied.
+    """
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: source.read(READ_CHUNK), b''):
+        digest.update(chunk)
+        target.write(chunk)
+    return digest.hexdigest()
+
+def export_submissions(path, files, pairs=(), compression=Constants.EXPORT_COMPRESSION, progress=None):
+    """
+    Write files into a zip archive at path, streaming each one in chunks and storing
+    identical contents once. manifest.json maps every file to its stored copy and lists
+    the pair records (see pair_record). progress(done, total) is called after each file.
+    Return the number of distinct contents stored. A failed export removes the archive.
+    """
+    stored = {}  # content hash -> path inside the archive
+    entries = []
+    archive = zipfile.ZipFile(path, 'w', compression=COMPRESSION[compression])
+    try:
+        with archive:
+            for done, name in enumerate(files, 1):
+                # Hashed again rather than trusting the hash from the comparison, as the file may have changed
+                digest = hash_submission(name)
+                if digest not in stored:
+                    target_path = stored_path(name, digest)
+                    with open_submission(name) as source, \
+                            archive.open(target_path, 'w', force_zip64=True) as target:
+                        if copy_hashed(source, target) != digest:
+                            raise OSError(f'{name} changed while it was being exported')
+                    stored[digest] = target_path
+                entries.append({'name': name, 'path': stored[digest], 'sha256': digest,
+                                'size': submission_size(name)})
+                if progress is not None:
+                    progress(done, len(files))
+            manifest = {'version': MANIFEST_VERSION, 'files': entries, 'pairs': list(pairs)}
+            archive.writestr(MANIFEST_NAME, json.dumps(manifest, indent=1))
+    except BaseException:
+        os.remove(path)  # rather than leave a truncated archive without its manifest
+        raise
+    return len(stored)
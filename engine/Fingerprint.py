@@ -0,0 +1,106 @@
+import io
+import keyword
+import tokenize
+import zlib
+
+import Constants
+from engine.Profiling import timed
+
+SKIPPED_TOKENS = {tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT,
+                  tokenize.ENCODING, tokenize.ENDMARKER}
+
+def normalized_tokens(content):
+    """
+    Tokenize source code, replacing identifiers, numbers and strings by placeholders
+    so that renaming variables or changing literals keeps the token stream intact.
+    """
+    tokens = []
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(content).readline):
+            if token.type in SKIPPED_TOKENS:
+                continue
+            if token.type == tokenize.NAME:
+                tokens.append(token.string if keyword.iskeyword(token.string) else 'V')
+            elif token.type == tokenize.NUMBER:
+                tokens.append('N')
+            elif token.type == tokenize.STRING:
+                tokens.append('S')
+            else:
+                tokens.append(token.string)
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        pass  # keep the tokens read so far
+    return tokens
+
+def kgram_hashes(tokens, k):
+    return [zlib.crc32(' '.join(tokens[i:i + k]).encode('utf-8')) for i in range(len(tokens) - k + 1)]
+
+def winnow(hashes, window):
+    """
+    Select the rightmost minimal hash of every window of consecutive k-gram hashes.
+    Returns (hash, position) pairs; any shared run of window + k - 1 tokens
+    is guaranteed to produce a shared fingerprint.
+    """
+    if len(hashes) <= window:
+        return [(min(hashes), hashes.index(min(hashes)))] if hashes else []
+
+    fingerprints = []
+    last_position = -1
+    for start in range(len(hashes) - window + 1):
+        position = start
+        for i in range(start + 1, start + window):
+            if hashes[i] <= hashes[position]:
+                position = i
+        if position != last_position:
+            fingerprints.append((hashes[position], position))
+            last_position = position
+    return fingerprints
+
+@timed('fingerprint')
+def fingerprint(content, k=Constants.WINNOW_K, window=Constants.WINNOW_WINDOW):
+    return {h for h, _ in winnow(kgram_hashes(normalized_tokens(content), k), window)}
+
+class FingerprintIndex:
+    """
+    Inverted index from winnowed fingerprints to the files containing them.
+    """
+    def __init__(self, k=Constants.WINNOW_K, window=Constants.WINNOW_WINDOW):
+        self.k = k
+        self.window = window
+        self.fingerprints = {}  # file -> set of fingerprints
+        self.postings = {}  # fingerprint -> set of files
+
+    def add(self, file, content, fingerprints=None):
+        if file in self.fingerprints:
+            self.remove(file)
+        if fingerprints is None:
+            fingerprints = fingerprint(content, self.k, self.window)
+        self.fingerprints[file] = fingerprints
+        for h in fingerprints:
+            self.postings.setdefault(h, set()).add(file)
+
+    def remove(self, file):
+        for h in self.fingerprints.pop(file, ()):
+            files = self.postings[h]
+            files.discard(file)
+            if not files:
+                del self.postings[h]
+
+    def shared_counts(self, file):
+        counts = {}
+        for h in self.fingerprints.get(file, ()):
+            for other in self.postings[h]:
+                counts[other] = counts.get(other, 0) + 1
+        return counts
+
+    def resemblance(self, file1, file2, shared):
+        smaller = min(len(self.fingerprints[file1]), len(self.fingerprints[file2]))
+        return shared / smaller if smaller else 0
+
+    def candidates(self, file, compare_files, threshold=Constants.FINGERPRINT_THRESHOLD):
+        """
+        Return the files of compare_files, in their original order, that share
+        enough fingerprints with file to be worth a detailed comparison.
+        """
+        counts = self.shared_counts(file)
+        return [other for other in compare_files
+                if other in counts and self.resemblance(file, other, counts[other]) >= threshold]
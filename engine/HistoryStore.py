@@ -0,0 +1,95 @@
+import datetime
+import json
+import os
+import sqlite3
+
+import Constants
+from engine.Profiling import timed
+
+class HistoryStore:
+    """
+    Comparison history in SQLite, indexed by user, timestamp and file so that one
+    user's records can be read without loading anybody else's.
+    """
+    COLUMNS = ('timestamp', 'base_file', 'compare_file', 'similarity')
+
+    def __init__(self, path=Constants.HISTORY_PATH):
+        created = not os.path.exists(path)
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS history ('
+                                    'id INTEGER PRIMARY KEY, username TEXT NOT NULL, timestamp TEXT NOT NULL, '
+                                    'base_file TEXT NOT NULL, compare_file TEXT NOT NULL, similarity REAL NOT NULL)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS history_user_time ON history (username, timestamp)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS history_base_file ON history (base_file)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS history_compare_file ON history (compare_file)')
+            # One index per sort column, so a page seeks to its first row instead of sorting the user's history
+            for column in ('similarity', 'base_file', 'compare_file'):
+                self.connection.execute(f'CREATE INDEX IF NOT EXISTS history_user_{column} '
+                                        f'ON history (username, {column})')
+        if created:
+            self.import_json(Constants.LEGACY_HISTORY_PATH)
+
+    def import_json(self, path):
+        try:
+            with open(path, 'r') as file:
+                history = json.load(file)
+        except FileNotFoundError:
+            return
+        with self.connection:
+            for username, records in history.items():
+                self.connection.executemany(
+                    'INSERT INTO history (username, timestamp, base_file, compare_file, similarity) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    [(username, *(record[column] for column in self.COLUMNS)) for record in records])
+
+    @timed('save_history')
+    def save_run(self, username, duplicates):
+        """
+        Append all (base_file, compare_file, similarity) results of one run in a single transaction.
+        """
+        timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO history (username, timestamp, base_file, compare_file, similarity) VALUES (?, ?, ?, ?, ?)',
+                [(username, timestamp, base_file, compare_file, similarity)
+                 for base_file, compare_file, similarity in duplicates])
+
+    def where(self, username, filter_text):
+        if not filter_text:
+            return 'WHERE username = ?', (username,)
+        pattern = f'%{filter_text}%'
+        return 'WHERE username = ? AND (base_file LIKE ? OR compare_file LIKE ?)', (username, pattern, pattern)
+
+    def count(self, username, filter_text=''):
+        where, parameters = self.where(username, filter_text)
+        return self.connection.execute(f'SELECT COUNT(*) FROM history {where}', parameters).fetchone()[0]
+
+    def page(self, username, limit, order_by='timestamp', descending=False, filter_text='', after=None):
+        """
+        Return up to limit (timestamp, base_file, compare_file, similarity, id) rows of one user,
+        sorted by one of COLUMNS and optionally filtered by a substring of either file.
+        Pass the last row of the previous page as after to get the next one: the query
+        seeks to it instead of skipping an offset, so every page costs the same.
+        """
+        if order_by not in self.COLUMNS:
+            raise ValueError(f'Cannot sort history by {order_by}')
+        direction = 'DESC' if descending else 'ASC'
+        where, parameters = self.where(username, filter_text)
+        if after is not None:
+            where += f' AND ({order_by}, id) {"<" if descending else ">"} (?, ?)'
+            parameters = (*parameters, after[self.COLUMNS.index(order_by)], after[-1])
+        return self.connection.execute(
+            f'SELECT timestamp, base_file, compare_file, similarity, id FROM history {where} '
+            f'ORDER BY {order_by} {direction}, id {direction} LIMIT ?',
+            (*parameters, limit)).fetchall()
+
+    def close(self):
+        self.connection.close()
+
+def save_history(username, duplicates: list):
+    store = HistoryStore()
+    try:
+        store.save_run(username, duplicates)
+    finally:
+        store.close()
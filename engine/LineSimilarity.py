@@ -0,0 +1,127 @@
+import bisect
+import heapq
+import sys
+import time
+
+import Constants
+from engine.AST import read_file, bounded_similarity, calculate_overall_similarity
+from engine.Profiling import timed
+
+def collapse_whitespace(line):
+    return ' '.join(line.split())
+
+def ngrams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+class LineIndex:
+    """
+    The distinct lines of one file, indexed by exact text, by whitespace-normalized
+    text and by character n-grams, to find the best matching line without comparing
+    against every line.
+    """
+    def __init__(self, lines, n=Constants.LINE_NGRAM):
+        self.n = n
+        self.lines = list(dict.fromkeys(lines))
+        self.exact = set(self.lines)
+        self.lengths = [len(line) for line in self.lines]
+        self.by_length = sorted(range(len(self.lines)), key=self.lengths.__getitem__)
+        self.sorted_lengths = [self.lengths[index] for index in self.by_length]
+        self.normalized = {}  # whitespace-normalized line -> indices
+        self.postings = {}  # n-gram -> indices
+        for index, line in enumerate(self.lines):
+            collapsed = collapse_whitespace(line)
+            self.normalized.setdefault(collapsed, []).append(index)
+            for gram in ngrams(collapsed, n):
+                self.postings.setdefault(gram, []).append(index)
+
+    def candidates(self, line, limit):
+        collapsed = collapse_whitespace(line)
+        grams = ngrams(collapsed, self.n)
+        if not grams:
+            return self.normalized.get(collapsed, [])
+        counts = {}
+        for gram in grams:
+            for index in self.postings.get(gram, ()):
+                counts[index] = counts.get(index, 0) + 1
+        ranked = heapq.nlargest(limit, counts, key=counts.__getitem__)
+        return self.normalized.get(collapsed, []) + ranked
+
+    def by_length_bound(self, length):
+        """
+        Yield (bound, index) for every line in decreasing order of the length bound
+        2 * min / total, walking outwards from the lines of the same length.
+        """
+        right = bisect.bisect_left(self.sorted_lengths, length)
+        left = right - 1
+        while left >= 0 or right < len(self.by_length):
+            left_bound = (2.0 * self.sorted_lengths[left] / (self.sorted_lengths[left] + length)
+                          if left >= 0 else -1)
+            right_bound = (2.0 * length / (self.sorted_lengths[right] + length)
+                           if right < len(self.by_length) else -1)
+            if left_bound >= right_bound:
+                yield left_bound, self.by_length[left]
+                left -= 1
+            else:
+                yield right_bound, self.by_length[right]
+                right += 1
+
+    def best_similarity(self, line, limit=Constants.LINE_CANDIDATES):
+        if line in self.exact:
+            return 1.0
+        length = len(line)
+        best = 0
+        tried = set()
+        # The n-gram candidates usually hold the best line; scoring them first makes
+        # the bounds below strict enough to settle the remaining lines cheaply
+        for index in self.candidates(line, limit):
+            if index not in tried:
+                tried.add(index)
+                similarity = bounded_similarity(line, self.lines[index], length, self.lengths[index], 0, best)
+                if similarity is not None and similarity > best:
+                    best = similarity
+        for bound, index in self.by_length_bound(length):
+            if bound <= best:
+                break
+            if index not in tried:
+                similarity = bounded_similarity(line, self.lines[index], length, self.lengths[index], 0, best)
+                if similarity is not None and similarity > best:
+                    best = similarity
+        return best
+
+@timed('line_similarity')
+def line_similarity(lines1, lines2, index=None, limit=Constants.LINE_CANDIDATES):
+    """
+    Same score as calculate_overall_similarity: the mean over the lines of lines1 of
+    their best SequenceMatcher ratio against lines2. Each distinct line is scored once,
+    first against its most promising candidates, then against the other lines only
+    while their upper bounds can still beat the best ratio. Empty input scores 0.
+    """
+    if not lines1:
+        return 0.0
+    if index is None:
+        index = LineIndex(lines2)
+    best = {}
+    for line in lines1:
+        if line not in best:
+            best[line] = index.best_similarity(line, limit)
+    return sum(best[line] for line in lines1) / len(lines1)
+
+def main(files, tolerance=0.01):
+    worst = 0
+    for i, file1 in enumerate(files):
+        lines1 = read_file(file1).splitlines()
+        for file2 in files[i + 1:]:
+            lines2 = read_file(file2).splitlines()
+            start = time.perf_counter()
+            reference = calculate_overall_similarity(lines1, lines2)
+            reference_time = time.perf_counter() - start
+            start = time.perf_counter()
+            indexed = line_similarity(lines1, lines2)
+            indexed_time = time.perf_counter() - start
+            worst = max(worst, abs(reference - indexed))
+            print(f'{file1} vs {file2}: {reference:.4f} in {reference_time:.3f}s, '
+                  f'indexed {indexed:.4f} in {indexed_time:.3f}s')
+    print(f'Largest difference: {worst:.4f} ({"within" if worst <= tolerance else "above"} tolerance {tolerance})')
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,104 @@
+import random
+
+import Constants
+from engine.Fingerprint import normalized_tokens, kgram_hashes
+from engine.Profiling import timed
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+def shingles(content, k=Constants.MINHASH_SHINGLE):
+    return set(kgram_hashes(normalized_tokens(content), k))
+
+def band_layout(num_perm, threshold):
+    """
+    Choose (bands, rows) so that the LSH threshold (1/bands)^(1/rows) is the
+    largest one not above the requested similarity, favouring recall.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+class MinHashLSH:
+    """
+    MinHash signatures over normalized token shingles, bucketed by LSH bands to
+    find pairs whose estimated Jaccard similarity reaches the threshold.
+    """
+    def __init__(self, threshold=Constants.MINHASH_THRESHOLD, num_perm=Constants.MINHASH_PERMUTATIONS,
+                 seed=1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = band_layout(num_perm, threshold)
+        rng = random.Random(seed)
+        self.permutations = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+                             for _ in range(num_perm)]
+        self.signatures = {}  # file -> signature tuple
+        self.buckets = {}  # (band, rows) -> set of files
+
+    @timed('minhash')
+    def signature(self, content):
+        values = shingles(content)
+        if not values:
+            return None
+        return tuple(min(((a * value + b) % MERSENNE_PRIME) & MAX_HASH for value in values)
+                     for a, b in self.permutations)
+
+    def band_keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def add(self, file, content, signature=None):
+        if file in self.signatures:
+            self.remove(file)
+        if signature is None and content is not None:
+            signature = self.signature(content)
+        self.signatures[file] = signature
+        if signature is not None:
+            for key in self.band_keys(signature):
+                self.buckets.setdefault(key, set()).add(file)
+
+    def remove(self, file):
+        signature = self.signatures.pop(file, None)
+        if signature is not None:
+            for key in self.band_keys(signature):
+                files = self.buckets[key]
+                files.discard(file)
+                if not files:
+                    del self.buckets[key]
+
+    def estimate(self, file1, file2):
+        signature1 = self.signatures.get(file1)
+        signature2 = self.signatures.get(file2)
+        if signature1 is None or signature2 is None:
+            return 0
+        return sum(v1 == v2 for v1, v2 in zip(signature1, signature2)) / self.num_perm
+
+    def neighbours(self, file):
+        signature = self.signatures.get(file)
+        if signature is None:
+            return set()
+        found = set()
+        for key in self.band_keys(signature):
+            found |= self.buckets[key]
+        return {other for other in found if self.estimate(file, other) >= self.threshold}
+
+    def candidates(self, file, compare_files):
+        neighbours = self.neighbours(file)
+        return [other for other in compare_files if other in neighbours]
+
+    def candidate_pairs(self):
+        """
+        Return every unordered pair of indexed files whose estimated similarity
+        reaches the threshold, as (file1, file2, estimate) sorted by estimate.
+        """
+        pairs = set()
+        for files in self.buckets.values():
+            if len(files) > 1:
+                ordered = sorted(files)
+                pairs.update((f1, f2) for i, f1 in enumerate(ordered) for f2 in ordered[i + 1:])
+        results = [(f1, f2, self.estimate(f1, f2)) for f1, f2 in pairs]
+        results = [result for result in results if result[2] >= self.threshold]
+        results.sort(key=lambda result: (-result[2], result[0], result[1]))
+        return results
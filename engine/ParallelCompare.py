@@ -0,0 +1,137 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import Constants
+from engine.AST import PreparedDocument, find_similar_blocks, compact_matches
+from engine import Profiling
+from engine.LineSimilarity import LineIndex, line_similarity
+from engine.Submissions import READ_ERRORS, read_submission, submission_size
+
+# Workers are spawned rather than forked: a fork would share the parent's open zip
+# archives (and their file offsets) with every worker, and would fork the GUI with its Qt threads
+POOL_CONTEXT = multiprocessing.get_context('spawn')
+
+def compare_chunk(chunk, precompute_blocks=False):
+    """
+    Compare a chunk of (index, base_file, compare_file) pairs in a worker process and
+    return (results, skipped). With precompute_blocks, the block matches of suspicious
+    pairs are computed too. Pairs with a file that cannot be read are left out of the
+    results and listed in skipped as (base_file, compare_file, error message).
+    """
+    contents = {}
+    line_indexes = {}
+    documents = {}  # compact enough to keep for every file of the chunk
+
+    def content(file):
+        if file not in contents:
+            contents[file] = read_submission(file)
+        return contents[file]
+
+    def line_index(file):
+        if file not in line_indexes:
+            line_indexes[file] = LineIndex(content(file).splitlines())
+        return line_indexes[file]
+
+    def document(file):
+        if file not in documents:
+            documents[file] = PreparedDocument(content(file))
+        return documents[file]
+
+    results = []
+    skipped = []
+    for index, base_file, compare_file in chunk:
+        try:
+            content1 = content(base_file)
+            content2 = content(compare_file)
+        except READ_ERRORS as error:
+            skipped.append((base_file, compare_file, str(error)))
+            continue
+        similarity = line_similarity(content1.splitlines(), None, line_index(compare_file))
+        blocks = None
+        if precompute_blocks and similarity >= Constants.SUS_THRESHOLD:
+            try:
+                blocks = compact_matches(*find_similar_blocks(document(base_file), document(compare_file)))
+            except SyntaxError:
+                pass  # left to the detail view to report
+        results.append((index, base_file, compare_file, similarity, blocks))
+    Profiling.count('pairs_compared', len(results))
+    return results, skipped
+
+def profiled_chunk(chunk, precompute_blocks=False):
+    """
+    compare_chunk in a worker process with profiling on: return its results, skipped
+    pairs and the statistics record of the chunk, for the parent to merge into its run.
+    """
+    Profiling.enable()
+    statistics = Profiling.reset()
+    return (*compare_chunk(chunk, precompute_blocks), statistics.to_record())
+
+def pair_cost(base_file, compare_file, sizes):
+    # Line similarity still grows with the product of the file lengths
+    try:
+        for file in (base_file, compare_file):
+            if file not in sizes:
+                sizes[file] = submission_size(file)
+        return sizes[base_file] * sizes[compare_file]
+    except READ_ERRORS:
+        return 0  # reported by the worker that fails to read it
+
+def schedule(pairs, chunk_size, workers=1):
+    """
+    Split pairs into chunks of at most chunk_size, small enough to give every worker
+    several of them. The pairs are dealt out longest-first round-robin, so each chunk
+    gets its share of the expensive pairs and the first chunks start the longest ones.
+    """
+    if not pairs:
+        return []
+    chunk_size = max(1, min(chunk_size, math.ceil(len(pairs) / (workers * 4))))
+    chunk_count = math.ceil(len(pairs) / chunk_size)
+    sizes = {}
+    costs = {}
+    for base_file, compare_file in pairs:
+        if (base_file, compare_file) not in costs:
+            costs[base_file, compare_file] = pair_cost(base_file, compare_file, sizes)
+    indexed = sorted(((index, base_file, compare_file) for index, (base_file, compare_file) in enumerate(pairs)),
+                     key=lambda pair: -costs[pair[1], pair[2]])
+    return [indexed[i::chunk_count] for i in range(chunk_count)]
+
+def iter_compare_pairs(pairs, workers=Constants.COMPARE_WORKERS, chunk_size=Constants.COMPARE_CHUNK_SIZE,
+                       precompute_blocks=False, skipped=None):
+    """
+    Yield (index, base_file, compare_file, similarity, blocks) for every pair as soon as
+    its chunk is done. blocks holds the compact block matches of suspicious pairs when
+    precompute_blocks is set, else None. Closing the generator cancels the chunks that
+    have not started. With profiling on, the statistics of the worker processes are
+    merged into the current run. Pairs with a file that cannot be read are left out and
+    reported through skipped(base_file, compare_file, error message).
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = schedule(pairs, chunk_size, workers)
+
+    def finished(results, skipped_pairs):
+        if skipped is not None:
+            for skipped_pair in skipped_pairs:
+                skipped(*skipped_pair)
+        return results
+
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield from finished(*compare_chunk(chunk, precompute_blocks))
+        return
+
+    profiled = Profiling.enabled
+    executor = ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=POOL_CONTEXT)
+    try:
+        futures = [executor.submit(profiled_chunk if profiled else compare_chunk, chunk, precompute_blocks)
+                   for chunk in chunks]
+        for future in as_completed(futures):
+            if profiled:
+                results, skipped_pairs, record = future.result()
+                Profiling.statistics.merge(record)
+                yield from finished(results, skipped_pairs)
+            else:
+                yield from finished(*future.result())
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,135 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+import Constants
+
+enabled = Constants.PROFILING  # collect stage timings and counters; off, every hook is a flag check
+
+class RunStatistics:
+    """
+    Timings and counters of one run, aggregated per stage name. Stage timings are
+    inclusive, so a stage that runs inside another is counted in both. The GUI thread
+    and a worker thread may update the same statistics, so updates take a lock.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timers = {}  # stage -> [calls, seconds]
+        self.counters = {}  # counter -> total
+
+    def add_time(self, name, seconds, calls=1):
+        with self.lock:
+            timer = self.timers.setdefault(name, [0, 0.0])
+            timer[0] += calls
+            timer[1] += seconds
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def merge(self, record):
+        """
+        Add the timings and counters of a record made by to_record, e.g. from a worker process.
+        """
+        for name, (calls, seconds) in record['timers'].items():
+            self.add_time(name, seconds, calls)
+        for name, amount in record['counters'].items():
+            self.count(name, amount)
+
+    def to_record(self):
+        with self.lock:
+            return {'timers': {name: list(timer) for name, timer in self.timers.items()},
+                    'counters': dict(self.counters)}
+
+    def rows(self):
+        """
+        Return (stage, calls, seconds) for every stage, slowest first.
+        """
+        with self.lock:
+            rows = [(name, calls, seconds) for name, (calls, seconds) in self.timers.items()]
+        return sorted(rows, key=lambda row: -row[2])
+
+    def summary(self, limit=4):
+        return ', '.join(f'{name} {seconds:.2f}s' for name, _, seconds in self.rows()[:limit])
+
+statistics = RunStatistics()  # statistics of the current run
+
+class Stage:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        statistics.add_time(self.name, time.perf_counter() - self.start)
+
+class NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+NULL_STAGE = NullStage()
+
+def stage(name):
+    """
+    Time a block as one call of the named stage: `with stage('parse'): ...`.
+    """
+    return Stage(name) if enabled else NULL_STAGE
+
+def timed(name):
+    """
+    Decorator timing every call of a function as the named stage.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                statistics.add_time(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def count(name, amount=1):
+    if enabled:
+        statistics.count(name, amount)
+
+def enable(flag=True):
+    global enabled
+    enabled = flag
+
+def reset():
+    """
+    Start the statistics of a new run and return them.
+    """
+    global statistics
+    statistics = RunStatistics()
+    return statistics
+
+@contextmanager
+def capture(path=None):
+    """
+    Run the block under cProfile and write its stats to path, for pstats or snakeviz.
+    Without a path the block runs unprofiled.
+    """
+    if not path:
+        yield
+        return
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
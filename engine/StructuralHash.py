@@ -0,0 +1,66 @@
+import ast
+import hashlib
+
+def name_placeholder(node, field):
+    # The identifiers normalize_variable_names renames; everything else is kept verbatim
+    if isinstance(node, ast.Name) and field == 'id':
+        return isinstance(node.ctx, (ast.Load, ast.Store))
+    return isinstance(node, ast.arg) and field == 'arg'
+
+def subtree_hash(node, hashes):
+    """
+    Hash node types and fields bottom-up, with renamable identifiers replaced by a
+    placeholder, so renamed clones get the same hash. Stores the hash of every
+    statement in the subtree into hashes (keyed by node id).
+    """
+    parts = [type(node).__name__]
+    for field, value in ast.iter_fields(node):
+        if isinstance(value, ast.AST):
+            parts.append(f'{field}={subtree_hash(value, hashes):x}')
+        elif isinstance(value, list):
+            items = [f'{subtree_hash(item, hashes):x}' if isinstance(item, ast.AST) else repr(item) for item in value]
+            parts.append(f'{field}=[{",".join(items)}]')
+        elif name_placeholder(node, field):
+            parts.append(f'{field}=_')
+        else:
+            parts.append(f'{field}={value!r}')
+    digest = int.from_bytes(hashlib.blake2b('|'.join(parts).encode('utf-8'), digest_size=8).digest(), 'big')
+    if isinstance(node, ast.stmt):
+        hashes[id(node)] = digest
+    return digest
+
+def statement_hashes(tree, statements):
+    hashes = {}
+    subtree_hash(tree, hashes)
+    return [hashes[id(node)] for node in statements]
+
+class CloneIndex:
+    """
+    Statements of many prepared documents grouped by structural hash, to find exact
+    and renamed clones across a corpus by lookup.
+    """
+    def __init__(self):
+        self.statements = {}  # hash -> list of (file, statement index)
+        self.documents = {}
+
+    def add(self, file, document):
+        self.documents[file] = document
+        for index, digest in enumerate(document.hashes):
+            self.statements.setdefault(digest, []).append((file, index))
+
+    def clones(self, min_length=0):
+        """
+        Return groups of (file, statement index) whose normalized sources are identical
+        and that span more than one file.
+        """
+        groups = []
+        for occurrences in self.statements.values():
+            if len(occurrences) < 2:
+                continue
+            by_source = {}
+            for file, index in occurrences:
+                document = self.documents[file]
+                if document.lengths[index] >= min_length:
+                    by_source.setdefault(document.sources[index], []).append((file, index))
+            groups.extend(group for group in by_source.values() if len({file for file, _ in group}) > 1)
+        return groups
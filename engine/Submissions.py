@@ -0,0 +1,174 @@
+import fnmatch
+import glob
+import hashlib
+import itertools
+import os
+import zipfile
+import zlib
+
+from engine.Profiling import count, timed
+
+MEMBER_SEPARATOR = '::'  # between an archive path, a member path and its index in a submission name
+READ_CHUNK = 1 << 16  # bytes read from a file or zip member at a time
+# What reading a missing, unreadable, corrupt or non-UTF-8 submission raises
+READ_ERRORS = (OSError, UnicodeDecodeError, zipfile.BadZipFile, zlib.error)
+
+open_archives = {}  # archive path -> ((size, mtime in ns), ZipFile), kept open per process
+content_hashes = {}  # submission name -> SHA-256 of its bytes, recorded while reading
+
+def archive(path):
+    """
+    Return the open ZipFile of an archive, reopening it when the archive has been
+    rewritten since it was opened.
+    """
+    stat = os.stat(path)
+    key = (stat.st_size, stat.st_mtime_ns)
+    if path in open_archives:
+        opened, zip_file = open_archives[path]
+        if opened == key:
+            return zip_file
+        zip_file.close()  # streams still open on it keep the old file until they close
+        prefix = path + MEMBER_SEPARATOR
+        for name in [name for name in content_hashes if name.startswith(prefix)]:
+            del content_hashes[name]
+    zip_file = zipfile.ZipFile(path)
+    open_archives[path] = (key, zip_file)
+    return zip_file
+
+def member_name(archive_path, member, index):
+    """
+    Name a zip member by its (archive, member path, index) triple, so members that
+    share a path inside one archive stay distinct.
+    """
+    return f'{archive_path}{MEMBER_SEPARATOR}{member}{MEMBER_SEPARATOR}{index}'
+
+def split_name(name):
+    """
+    Return (archive path, member path, index) for a zip member, or (name, None, None)
+    for a file. Names without an index refer to the last member with that path.
+    """
+    if MEMBER_SEPARATOR not in name:
+        return name, None, None
+    archive_path, rest = name.split(MEMBER_SEPARATOR, 1)
+    member, separator, index = rest.rpartition(MEMBER_SEPARATOR)
+    if separator and index.isdigit():
+        return archive_path, member, int(index)
+    return archive_path, rest, None
+
+def member_info(archive_path, member, index):
+    if index is None:
+        return archive(archive_path).getinfo(member)
+    return archive(archive_path).infolist()[index]
+
+def open_submission(name):
+    archive_path, member, index = split_name(name)
+    if member is None:
+        return open(name, 'rb')
+    return archive(archive_path).open(member_info(archive_path, member, index))
+
+@timed('read')
+def read_submission(name):
+    """
+    Stream a file or zip member into memory, hashing it on the way, and return its text
+    with newlines normalized as in text mode.
+    """
+    digest = hashlib.sha256()
+    chunks = []
+    with open_submission(name) as stream:
+        for chunk in iter(lambda: stream.read(READ_CHUNK), b''):
+            digest.update(chunk)
+            chunks.append(chunk)
+    content_hashes[name] = digest.hexdigest()
+    count('files_read')
+    return b''.join(chunks).decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+def submission_hash(name):
+    if name not in content_hashes:
+        hash_submission(name)
+    return content_hashes[name]
+
+def hash_submission(name):
+    """
+    Hash the current contents of a submission, replacing the hash recorded when it was read.
+    """
+    digest = hashlib.sha256()
+    with open_submission(name) as stream:
+        for chunk in iter(lambda: stream.read(READ_CHUNK), b''):
+            digest.update(chunk)
+    content_hashes[name] = digest.hexdigest()
+    return content_hashes[name]
+
+def submission_size(name):
+    archive_path, member, index = split_name(name)
+    if member is None:
+        return os.path.getsize(name)
+    return member_info(archive_path, member, index).file_size
+
+def collect_submissions(paths, pattern='*.py'):
+    """
+    Expand directories (recursively), glob patterns and zip archives into a sorted,
+    duplicate-free list of submission names.
+    """
+    names = []
+    for path in paths:
+        matches = glob.glob(path, recursive=True) if glob.has_magic(path) else [path]
+        for match in matches:
+            if os.path.isdir(match):
+                names.extend(glob.glob(os.path.join(match, '**', pattern), recursive=True))
+            elif zipfile.is_zipfile(match):
+                names.extend(member_name(match, info.filename, index)
+                             for index, info in enumerate(archive(match).infolist())
+                             if not info.is_dir() and fnmatch.fnmatch(os.path.basename(info.filename), pattern))
+            else:
+                names.append(match)
+    return sorted(dict.fromkeys(names))
+
+class DuplicateGroups:
+    """
+    Groups submissions with identical contents, so each distinct content is screened
+    and compared once and its results are repeated for every copy.
+    """
+    def __init__(self):
+        self.representatives = {}  # content hash -> first submission read with it
+        self.members = {}  # representative -> every submission with its contents, in order
+        self.aliases = {}  # submission -> representative
+
+    def add(self, name, digest):
+        """
+        Record a submission; return True if it is the first with its contents.
+        """
+        representative = self.representatives.setdefault(digest, name)
+        self.aliases[name] = representative
+        members = self.members.setdefault(representative, [])
+        if name not in members:
+            members.append(name)
+        return representative == name
+
+    def unique(self, names):
+        # Names never added, e.g. files that could not be read, are left out
+        return list(dict.fromkeys(self.aliases[name] for name in names if name in self.aliases))
+
+    def expand(self, base_file, compare_file, base_files, compare_files):
+        """
+        Yield every (base, compare) pair of copies represented by a compared pair,
+        limited to the given base and compare names.
+        """
+        for base_copy in self.members[base_file]:
+            if base_copy in base_files:
+                for compare_copy in self.members[compare_file]:
+                    if compare_copy in compare_files and compare_copy != base_copy:
+                        yield base_copy, compare_copy
+
+    def identical_pairs(self, base_files, compare_files, all_pairs=False):
+        """
+        Return the pairs of distinct copies of the same contents. With all_pairs, every
+        unordered pair is listed once instead of every base x compare combination.
+        """
+        pairs = []
+        for members in self.members.values():
+            if all_pairs:
+                pairs.extend(itertools.combinations([name for name in members if name in base_files], 2))
+            else:
+                pairs.extend((base_copy, compare_copy) for base_copy in members if base_copy in base_files
+                             for compare_copy in members if compare_copy in compare_files and compare_copy != base_copy)
+        return pairs
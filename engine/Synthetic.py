@@ -0,0 +1,231 @@
+import ast
+import builtins
+import random
+from collections import namedtuple
+
+from engine.AST import read_file
+
+VERBS = ('load', 'parse', 'count', 'merge', 'filter', 'score', 'build', 'update', 'find', 'collect', 'rank', 'check')
+NOUNS = ('items', 'records', 'scores', 'names', 'grid', 'values', 'lines', 'tokens', 'matrix', 'queue', 'graph',
+         'totals', 'weights', 'edges', 'nodes', 'words')
+CONSONANTS = 'bcdfghjklmnprstvwz'
+VOWELS = 'aeiou'
+OPERATORS = ('+', '-', '*', '//', '%')
+COMPARISONS = ('<', '>', '<=', '>=', '==', '!=')
+DEAD_CODE = ('if False:\n    {name} = {number}', '{name} = {number}', 'while False:\n    pass',
+             'assert {number} >= 0', '{name} = [{number}, {number}]')
+BUILTIN_NAMES = frozenset(dir(builtins))
+
+# One generated file: its contents, the family of files copied from one original,
+# and the mutations applied to the original to get it
+SyntheticFile = namedtuple('SyntheticFile', ['name', 'content', 'family', 'mutations'])
+
+def random_word(rng):
+    return ''.join(rng.choice(CONSONANTS) + rng.choice(VOWELS) for _ in range(rng.randint(1, 3)))
+
+def random_name(rng, used):
+    while True:
+        name = f'{rng.choice(VERBS)}_{random_word(rng)}' if rng.random() < 0.5 else \
+            f'{random_word(rng)}_{rng.choice(NOUNS)}'
+        if name not in used:
+            used.add(name)
+            return name
+
+def random_expression(rng, names, depth=0):
+    if depth >= 2 or rng.random() < 0.4:
+        return rng.choice(names) if names and rng.random() < 0.7 else str(rng.randint(0, 100))
+    return f'({random_expression(rng, names, depth + 1)} {rng.choice(OPERATORS)} ' \
+           f'{random_expression(rng, names, depth + 1)})'
+
+def random_block(rng, names, functions, indent, depth, used):
+    """
+    Return the lines of a random block of statements using the variables in names.
+    """
+    lines = []
+    pad = '    ' * indent
+    for _ in range(rng.randint(2, 4 if depth else 8)):
+        kind = rng.random()
+        if kind < 0.3 or not names:
+            name = random_name(rng, used) if not names or rng.random() < 0.5 else rng.choice(names)
+            lines.append(f'{pad}{name} = {random_expression(rng, names)}')
+            if name not in names:
+                names.append(name)
+        elif kind < 0.45:
+            lines.append(f'{pad}{rng.choice(names)} {rng.choice(OPERATORS)}= {random_expression(rng, names)}')
+        elif kind < 0.6 and depth < 2:
+            counter = random_name(rng, used)
+            lines.append(f'{pad}for {counter} in range({random_expression(rng, names)}):')
+            lines.extend(random_block(rng, names + [counter], functions, indent + 1, depth + 1, used))
+        elif kind < 0.75 and depth < 2:
+            lines.append(f'{pad}if {rng.choice(names)} {rng.choice(COMPARISONS)} {random_expression(rng, names)}:')
+            lines.extend(random_block(rng, list(names), functions, indent + 1, depth + 1, used))
+            if rng.random() < 0.5:
+                lines.append(f'{pad}else:')
+                lines.extend(random_block(rng, list(names), functions, indent + 1, depth + 1, used))
+        elif kind < 0.85 and functions:
+            function, arity = rng.choice(functions)
+            arguments = ', '.join(random_expression(rng, names, 1) for _ in range(arity))
+            name = random_name(rng, used)
+            lines.append(f'{pad}{name} = {function}({arguments})')
+            names.append(name)
+        else:
+            lines.append(f'{pad}print(f"{random_word(rng)} {rng.choice(NOUNS)}: {{{rng.choice(names)}}}")')
+    return lines
+
+def synthesize_program(rng, functions=(3, 6)):
+    """
+    Return the source of a random, independent program of a few functions and a main.
+    """
+    used = set()
+    lines = []
+    defined = []
+    for _ in range(rng.randint(*functions)):
+        name = random_name(rng, used)
+        parameters = [random_name(rng, used) for _ in range(rng.randint(1, 3))]
+        lines.append(f'def {name}({", ".join(parameters)}):')
+        body_names = list(parameters)
+        lines.extend(random_block(rng, body_names, defined, 1, 0, used))
+        lines.append(f'    return {random_expression(rng, body_names)}')
+        lines.append('')
+        defined.append((name, len(parameters)))
+    lines.append('def main():')
+    lines.extend(random_block(rng, [], defined, 1, 0, used))
+    lines.append('')
+    lines.append("if __name__ == '__main__':")
+    lines.append('    main()')
+    return '\n'.join(lines) + '\n'
+
+def defined_names(tree):
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+            names.add(node.id)
+    return {name for name in names if name not in BUILTIN_NAMES and not name.startswith('__')}
+
+def rename_identifiers(tree, rng):
+    """
+    Give every function, class, parameter and variable defined in the file a new name.
+    """
+    used = set()
+    mapping = {name: random_name(rng, used) for name in sorted(defined_names(tree))}
+
+    class Renamer(ast.NodeTransformer):
+        def visit_Name(self, node):
+            node.id = mapping.get(node.id, node.id)
+            return node
+
+        def visit_arg(self, node):
+            node.arg = mapping.get(node.arg, node.arg)
+            return node
+
+        def visit_FunctionDef(self, node):
+            node.name = mapping.get(node.name, node.name)
+            self.generic_visit(node)
+            return node
+
+        visit_AsyncFunctionDef = visit_FunctionDef
+        visit_ClassDef = visit_FunctionDef
+
+    return Renamer().visit(tree)
+
+def reorder_functions(tree, rng):
+    """
+    Shuffle the functions and classes of the module and the methods of each class,
+    leaving every other statement in place.
+    """
+    for node in [tree] + [node for node in ast.walk(tree) if isinstance(node, ast.ClassDef)]:
+        positions = [i for i, statement in enumerate(node.body)
+                     if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))]
+        definitions = [node.body[i] for i in positions]
+        rng.shuffle(definitions)
+        for i, definition in zip(positions, definitions):
+            node.body[i] = definition
+    return tree
+
+def insert_dead_code(tree, rng, rate=0.2):
+    """
+    Insert statements without effect at random places in function bodies.
+    """
+    used = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            body = []
+            for statement in node.body:
+                if rng.random() < rate:
+                    snippet = rng.choice(DEAD_CODE).format(name=f'_{random_name(rng, used)}',
+                                                           number=rng.randint(0, 999))
+                    body.extend(ast.parse(snippet).body)
+                body.append(statement)
+            node.body = body
+    return tree
+
+def change_literals(tree, rng, rate=0.5):
+    """
+    Change numbers and (non-docstring) strings.
+    """
+    docstrings = {id(node.body[0].value) for node in ast.walk(tree)
+                  if isinstance(node, (ast.Module, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+                  and node.body and isinstance(node.body[0], ast.Expr) and isinstance(node.body[0].value, ast.Constant)}
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Constant) or id(node) in docstrings or rng.random() >= rate:
+            continue
+        if isinstance(node.value, bool):
+            continue
+        if isinstance(node.value, (int, float)):
+            node.value = node.value + rng.randint(1, 9)
+        elif isinstance(node.value, str) and node.value:
+            node.value = node.value[::-1]
+    return tree
+
+MUTATIONS = {
+    'rename': rename_identifiers,
+    'reorder': reorder_functions,
+    'dead_code': insert_dead_code,
+    'literals': change_literals,
+}
+
+def mutate(content, rng, mutations=tuple(MUTATIONS)):
+    import astor
+    tree = ast.parse(content)
+    for mutation in mutations:
+        tree = MUTATIONS[mutation](tree, rng)
+    return astor.to_source(ast.fix_missing_locations(tree))
+
+def generate_corpus(size, seeds=(), copies=(1, 4), mutation_rate=0.6, seed=0):
+    """
+    Generate size files in families: an original followed by 1 to 4 plagiarized copies,
+    each with a random subset of MUTATIONS applied. The first families start from the
+    seed files, the others from synthesized programs, so that files of different
+    families are independent and files of one family are the plagiarism to detect.
+    """
+    rng = random.Random(seed)
+    seed_contents = [read_file(path) for path in seeds]
+    files = []
+    family = 0
+    while len(files) < size:
+        original = seed_contents[family] if family < len(seed_contents) else synthesize_program(rng)
+        files.append(SyntheticFile(f'family{family:05d}_0.py', original, family, ()))
+        for copy in range(1, rng.randint(*copies) + 1):
+            if len(files) >= size:
+                break
+            mutations = tuple(name for name in MUTATIONS if rng.random() < mutation_rate) or (rng.choice(list(MUTATIONS)),)
+            files.append(SyntheticFile(f'family{family:05d}_{copy}.py', mutate(original, rng, mutations),
+                                       family, mutations))
+        family += 1
+    return files
+
+def plagiarized_pairs(files):
+    """
+    Return the set of (name, name) pairs, in file order, that belong to one family.
+    """
+    pairs = set()
+    for i, file1 in enumerate(files):
+        for file2 in files[i + 1:]:
+            if file2.family != file1.family:
+                break
+            pairs.add((file1.name, file2.name))
+    return pairs
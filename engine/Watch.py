@@ -0,0 +1,80 @@
+import fnmatch
+import os
+
+def scan(root, pattern='*.py'):
+    """
+    Return {path: (size, mtime in ns)} for every file under root whose name matches
+    pattern, from directory listings and stat calls only.
+    """
+    stats = {}
+    directories = [root]
+    while directories:
+        try:
+            entries = os.scandir(directories.pop())
+        except OSError:
+            continue  # removed or unreadable since it was listed
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        directories.append(entry.path)
+                    elif entry.is_file() and fnmatch.fnmatch(entry.name, pattern):
+                        stat = entry.stat()
+                        stats[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    continue
+    return stats
+
+class DirectoryWatcher:
+    """
+    Keeps a corpus session in step with directory trees that are polled for changes.
+    A file is only read when its (size, mtime) differs from the one recorded in the
+    corpus, and only re-indexed when its content hash differs too, so unchanged files
+    cost one stat call per poll.
+    """
+    def __init__(self, session, roots, pattern='*.py'):
+        self.session = session
+        self.roots = [os.path.normpath(root) for root in roots]
+        self.pattern = pattern
+        self.failed = {}  # file -> (size, mtime) at which it could not be read, retried once it changes
+
+    def watches(self, name):
+        return any(name.startswith(os.path.join(root, '')) for root in self.roots)
+
+    def changes(self):
+        """
+        Return (changed, removed): {file: (size, mtime)} of the new and modified files,
+        and the corpus files under the roots that no longer exist.
+        """
+        current = {}
+        for root in self.roots:
+            current.update(scan(root, self.pattern))
+        changed = {name: stat for name, stat in current.items()
+                   if self.session.stats.get(name) != stat and self.failed.get(name) != stat}
+        removed = [name for name in self.session.files() if self.watches(name) and name not in current]
+        return changed, removed
+
+    def poll(self, progress=None, changes=None):
+        """
+        Apply the changes since the last poll, or the (changed, removed) already found by
+        changes(), to the session and return (pairs, retracted) like CorpusSession.update:
+        the pairs to compare and the keys of the pairs dropped.
+        """
+        changed, removed = changes or self.changes()
+        retracted = []
+        for name in removed:
+            retracted.extend(self.session.remove(name))
+
+        pairs = {}
+        for done, (name, stat) in enumerate(changed.items(), 1):
+            try:
+                new_pairs, dropped = self.session.update([name], stats={name: stat})
+            except (OSError, UnicodeDecodeError):
+                self.failed[name] = stat  # still being written, or not text
+                continue
+            self.failed.pop(name, None)
+            pairs.update(dict.fromkeys(new_pairs))
+            retracted.extend(dropped)
+            if progress is not None:
+                progress(done, len(changed))
+        return list(pairs), retracted
@@ -0,0 +1,53 @@
+"""
+Qt-free comparison engine shared by the GUI and the batch checker.
+
+Submodules are only imported when one of their names is first used, so that
+`import engine` stays cheap:
+
+    from engine import find_similar_blocks  # imports engine.AST now
+"""
+import importlib
+
+# Public name -> submodule defining it. Classes named like their module
+# (AnalysisCache, HistoryStore) are imported from the submodule directly.
+EXPORTS = {
+    'ENGINE_VERSION': 'AST',
+    'read_file': 'AST',
+    'normalize_variable_names': 'AST',
+    'PreparedDocument': 'AST',
+    'prepare_document': 'AST',
+    'SpanTable': 'AST',
+    'MatchStatistics': 'AST',
+    'find_similar_blocks': 'AST',
+    'compact_matches': 'AST',
+    'highlight_code': 'AST',
+    'highlight_ranges': 'AST',
+    'calculate_overall_similarity': 'AST',
+    'CloneIndex': 'StructuralHash',
+    'FingerprintIndex': 'Fingerprint',
+    'MinHashLSH': 'MinHash',
+    'LineIndex': 'LineSimilarity',
+    'line_similarity': 'LineSimilarity',
+    'iter_compare_pairs': 'ParallelCompare',
+    'get_cache': 'AnalysisCache',
+    'save_history': 'HistoryStore',
+    'collect_submissions': 'Submissions',
+    'read_submission': 'Submissions',
+    'submission_hash': 'Submissions',
+    'DuplicateGroups': 'Submissions',
+    'export_submissions': 'Export',
+    'CorpusSession': 'Corpus',
+    'DirectoryWatcher': 'Watch',
+    'pair_record': 'Export',
+    'RunStatistics': 'Profiling',
+}
+
+def __getattr__(name):
+    if name not in EXPORTS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(f'{__name__}.{EXPORTS[name]}'), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(EXPORTS))